@@ -1,4 +1,5 @@
 from pathlib import Path
+import json
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -21,6 +22,26 @@ SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
 PRODUCT_IMAGE_BASE_URL = os.environ.get('PRODUCT_IMAGE_BASE_URL', 'http://127.0.0.1:8000')
 
+# Si se sirve por CDN, prefijo completo que reemplaza a PRODUCT_IMAGE_BASE_URL + MEDIA_URL.
+PRODUCT_IMAGE_CDN_URL = os.environ.get('PRODUCT_IMAGE_CDN_URL', '')
+
+# Variantes (p. ej. miniaturas de la CDN) como JSON {"nombre": "sufijo"}: '{"thumbnail": "?w=200"}'.
+PRODUCT_IMAGE_VARIANTS = json.loads(os.environ.get('PRODUCT_IMAGE_VARIANTS', '{}'))
+
+STOCK_EVENT_SINKS = os.environ.get('STOCK_EVENT_SINKS', 'log').split(',')
+
+STOCK_EVENT_LOG_FILE = os.environ.get('STOCK_EVENT_LOG_FILE', os.path.join(BASE_DIR, 'stock_events.log'))
+
+STOCK_EVENT_HTTP_URL = os.environ.get('STOCK_EVENT_HTTP_URL', 'http://127.0.0.1:8001/stock-events')
+
+RESERVATION_TTL_SECONDS = int(os.environ.get('RESERVATION_TTL_SECONDS', 900))
+
+CHECKOUT_MODE = os.environ.get('CHECKOUT_MODE', 'sync')
+
+CHECKOUT_QUEUE_HOLD_SECONDS = int(os.environ.get('CHECKOUT_QUEUE_HOLD_SECONDS', 86400))
+
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_KEY_TTL_SECONDS', 86400))
+
 CSRF_COOKIE_SECURE = False 
 
 # Application definition
@@ -85,6 +106,27 @@ DATABASES = {
     }
 }
 
+# Caché de respuestas de datos de referencia (categorías, unidades, monedas y roles).
+# CACHE_BACKEND: locmem (un solo proceso), file o redis (Redis o cualquier
+# servidor compatible, en CACHE_LOCATION). Con varios procesos usar file o redis,
+# si no cada uno guarda su propio contador de versión.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'inventory-reference'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', os.path.join(BASE_DIR, 'cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+
+CACHE_BACKEND, CACHE_DEFAULT_LOCATION = CACHE_BACKENDS[os.environ.get('CACHE_BACKEND', 'locmem')]
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.environ.get('CACHE_LOCATION', CACHE_DEFAULT_LOCATION),
+    }
+}
+
+REFERENCE_CACHE_TIMEOUT = int(os.environ.get('REFERENCE_CACHE_TIMEOUT', 3600))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
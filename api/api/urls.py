@@ -53,12 +53,20 @@ urlpatterns = [
     path('product/restore/<int:pk>', ProductRestoreAPIView.as_view(), name='product-restore'),
     
     path('inventories', InventoryIndexAPIView.as_view(), name='inventory-index'),
+    path('inventories/low-stock', InventoryLowStockAPIView.as_view(), name='inventory-low-stock'),
     path('inventory/add', InventoryAddInputAPIView.as_view(), name='inventory-add'),
+    path('inventory/add/batch', InventoryAddBatchInputAPIView.as_view(), name='inventory-add-batch'),
     path('inventory/sub', InventorySubOutputAPIView.as_view(), name='inventory-subtraction'),
+    path('inventory/sub/pending/<int:pk>', PendingCheckoutShowAPIView.as_view(), name='pending-checkout-show'),
     path('inventory/<int:pk>', InventoryShowAPIView.as_view(), name='inventory-show'),
+    path('inventory/<int:pk>/as-of', InventoryAsOfAPIView.as_view(), name='inventory-as-of'),
 
     path('inventory', InventoryAddMinQuantityInputAPIView.as_view(), name='inventory-add'),
 
+    path('reservation/create', ReservationStoreAPIView.as_view(), name='reservation-create'),
+    path('reservation/<int:pk>/confirm', ReservationConfirmAPIView.as_view(), name='reservation-confirm'),
+    path('reservation/<int:pk>/release', ReservationReleaseAPIView.as_view(), name='reservation-release'),
+
     path('inputs',InputIndexAPIView.as_view(), name='input-index'),
     path('input/<int:pk>',InputShowAPIView.as_view(), name='input-show'),
 
@@ -70,4 +78,6 @@ urlpatterns = [
 
     path('details',DetailIndexAPIView.as_view(), name='detail-index'),
     path('detail/<int:pk>',DetailShowAPIView.as_view(), name='detail-show'),
+
+    path('reports/daily-movements',DailyMovementIndexAPIView.as_view(), name='daily-movement-index'),
 ]+ static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
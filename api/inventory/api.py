@@ -6,21 +6,33 @@ from inventory.models import User
 from .serializer import *
 from django.shortcuts import get_object_or_404
 from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from .filters import *
 from django.contrib.auth import authenticate, login, logout
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import SessionAuthentication
 from django.middleware.csrf import rotate_token
-from django.db.models import F
-from rest_framework.exceptions import ValidationError
+from django.db.models import Case, Count, F, Manager, Max, OuterRef, Prefetch, Q, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from base64 import b64decode, b64encode
 from django.urls import reverse
 from django.shortcuts import redirect
-from django.http import Http404
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
 from django.conf import settings
-from datetime import date
+from datetime import date, datetime, time, timedelta
+from django.utils.dateparse import parse_date, parse_datetime
 from .permissions import CustomPermission
+from .services import *
+from .idempotency import idempotent
+from .rows import compile_row_plan
+from . import reference_cache
+from .conditional import last_modified_from, make_etag, not_modified, query_fingerprint, with_validators
 from decimal import Decimal
+from django.db import transaction
 
 class WelcomeAPIView(APIView):
     def get(self, request):
@@ -75,23 +87,414 @@ class UserRegistration(APIView):
 class CustomPagination(PageNumberPagination):
     page_size_query_param = 'pag'
 
-class UserIndexAPIView(APIView):
+class LowStockPagination(CursorPagination):
+    page_size_query_param = 'pag'
+    ordering = 'id'
+
+class KeysetPagination:
+    """Paginación por clave (created_at, id), con ?cursor= (vacío para la primera página).
+
+    Cada página filtra desde la última fila vista sobre el índice
+    (deleted_at, created_at, id), así cuesta lo mismo a cualquier
+    profundidad aunque se acumulen filas eliminadas. El total
+    solo se cuenta con ?count=true.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'pag'
+    max_page_size = 1000
+    ordering = ('created_at', 'id')
+
+    def paginate_queryset(self, queryset, request):
+        self.request = request
+        try:
+            self.page_size = min(int(request.query_params.get(self.page_size_query_param) or 0), self.max_page_size)
+        except ValueError:
+            self.page_size = 0
+        self.page_size = self.page_size if self.page_size > 0 else api_settings.PAGE_SIZE
+
+        self.count = None
+        if request.query_params.get('count') in ('1', 'true'):
+            self.count = queryset.count()
+
+        position = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        queryset = queryset.order_by(*self.ordering)
+        if position:
+            created_at, pk = position
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+
+        page = list(queryset[:self.page_size + 1])
+        self.next_position = None
+        if len(page) > self.page_size:
+            page = page[:self.page_size]
+            self.next_position = (page[-1].created_at, page[-1].pk)
+        return page
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            created_at, pk = b64decode(cursor.encode('ascii'), altchars=b'-_').decode('ascii').split('|')
+            return datetime.fromisoformat(created_at), int(pk)
+        except (ValueError, UnicodeError):
+            raise ValidationError({"cursor": "El cursor no es válido."})
+
+    def encode_cursor(self, position):
+        created_at, pk = position
+        return b64encode(f"{created_at.isoformat()}|{pk}".encode('ascii'), altchars=b'-_').decode('ascii')
+
+    def get_next_link(self):
+        if not self.next_position:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        response = {}
+        if self.count is not None:
+            response["count"] = self.count
+        response["next"] = self.get_next_link()
+        response["results"] = data
+        return Response(response)
+
+def path_prefixes(paths):
+    """'product__category' también necesita 'product'."""
+    prefixes = set()
+    for path in paths:
+        parts = path.split('__')
+        prefixes.update('__'.join(parts[:end]) for end in range(1, len(parts) + 1))
+    return prefixes
+
+def has_updated_at(model, path):
+    for part in filter(None, path.split('__')):
+        model = model._meta.get_field(part).related_model
+    return any(field.name == 'updated_at' for field in model._meta.concrete_fields)
+
+def select_related_paths(queryset, prefix=''):
+    """Caminos del select_related de un queryset (p. ej. el de un Prefetch)."""
+    paths = []
+    related = queryset.query.select_related if queryset is not None else False
+    stack = [(prefix, related)] if isinstance(related, dict) else []
+    while stack:
+        base, children = stack.pop()
+        for name, nested in children.items():
+            paths.append(base + name)
+            stack.append((f'{base}{name}__', nested))
+    return paths
+
+def loaded_versions(instance, parts):
+    """updated_at de lo ya cargado por select_related/prefetch_related a lo largo de un camino."""
+    if instance is None:
+        return [None]
+    if not parts:
+        return [instance.updated_at]
+    related = getattr(instance, parts[0])
+    if isinstance(related, Manager):
+        # Relación múltiple ya precargada: entran también cuántas filas hay.
+        items = list(related.all())
+        return [len(items), *(version for item in items for version in loaded_versions(item, parts[1:]))]
+    return loaded_versions(related, parts[1:])
+
+class QueryPlanMixin:
+    """Cada recurso declara una vez cómo cargar sus relaciones.
+
+    ``select_related`` y ``prefetch_related`` deben cubrir todo lo que recorren
+    los serializadores anidados, así un listado cuesta un número fijo de
+    consultas sin importar cuántas filas devuelva.
+    """
+    model = None
+    serializer_class = None
+    select_related = ()
+    prefetch_related = ()
+    ordering = ()
+
+    # Relaciones del plan que no son campos del serializador sino que los alimentan.
+    plan_fields = {'stripes': 'available'}
+    scopes = {'live': 'objects', 'deleted': 'deleted_objects', 'all': 'all_objects'}
+
+    def sparse(self):
+        """Árbol de ?fields= / ?expand= de la petición, o None si no se pidió."""
+        if not hasattr(self, '_sparse'):
+            params = self.request.query_params
+            self._sparse = sparse_fields(params.get('fields'), params.get('expand'))
+        return self._sparse
+
+    def plan_wanted(self, path, many):
+        node = self.sparse()
+        parts = path.split('__')
+        for index, part in enumerate(parts):
+            if node == '*':
+                return True
+            part = self.plan_fields.get(part, part)
+            if part not in node:
+                return False
+            node = node[part]
+            if node is None:
+                # Relación pedida sin expandir: basta su id, salvo las de muchos
+                # y las que alimentan un campo pedido (plan_fields).
+                return (many or part != parts[index]) and index == len(parts) - 1
+        return True
+
+    def get_select_related(self):
+        if self.sparse() is None:
+            return self.select_related
+        # Se evalúa cada tramo para no perder product al descartar product__category.
+        return sorted(path for path in path_prefixes(self.select_related) if self.plan_wanted(path, False))
+
+    def get_prefetch_related(self):
+        if self.sparse() is None:
+            return self.prefetch_related
+        lookups = []
+        for lookup in self.prefetch_related:
+            through = getattr(lookup, 'prefetch_through', lookup)
+            if not self.plan_wanted(through, True):
+                continue
+            if getattr(lookup, 'queryset', None) is not None:
+                lookup = self.sparse_prefetch(lookup, through)
+            lookups.append(lookup)
+        return lookups
+
+    def sparse_prefetch(self, lookup, through):
+        """El Prefetch con el select_related de su queryset recortado a lo pedido."""
+        paths = path_prefixes(select_related_paths(lookup.queryset))
+        wanted = sorted(path for path in paths if self.plan_wanted(f'{through}__{path}', False))
+        queryset = lookup.queryset.select_related(None)
+        if wanted:
+            queryset = queryset.select_related(*wanted)
+        return Prefetch(through, queryset=queryset, to_attr=lookup.to_attr)
+
+    def get_manager(self):
+        """Por defecto solo filas vivas; ?scope=deleted|all para ver lo eliminado (p. ej. para restaurarlo)."""
+        name = self.scopes.get(self.request.query_params.get('scope'), 'objects')
+        return getattr(self.model, name, self.model._default_manager)
+
+    def get_queryset(self):
+        queryset = self.get_manager().all()
+        select_related = self.get_select_related()
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        prefetch_related = self.get_prefetch_related()
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        if self.ordering:
+            queryset = queryset.order_by(*self.ordering)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        return self.serializer_class(*args, sparse=self.sparse(), **kwargs)
+
+    def version_paths(self):
+        """Relaciones con updated_at que entran en la respuesta, para ETag y Last-Modified."""
+        lookups = list(self.get_select_related())
+        for lookup in self.get_prefetch_related():
+            through = getattr(lookup, 'prefetch_through', lookup)
+            lookups.append(through)
+            lookups.extend(select_related_paths(getattr(lookup, 'queryset', None), f'{through}__'))
+        return sorted(path for path in path_prefixes(lookups) if has_updated_at(self.model, path))
+
+    def instance_validators(self, instance):
+        """ETag y Last-Modified de un registro con lo que ya trajo la consulta, sin serializar.
+
+        Si anida listas no hay Last-Modified: una fila que sale de la lista no
+        mueve el máximo de updated_at. El ETag sí lo nota, porque cuenta las filas.
+        """
+        if not has_updated_at(self.model, ''):
+            return None, None
+        versions = [instance.updated_at]
+        for path in self.version_paths():
+            versions.extend(loaded_versions(instance, path.split('__')))
+        etag = make_etag(type(self).__name__, instance.pk, query_fingerprint(self.request), *versions)
+        if any(isinstance(version, int) for version in versions):
+            return etag, None
+        return etag, last_modified_from(version for version in versions if isinstance(version, datetime))
+
+    def present(self, data):
+        return data
+
+class IndexAPIView(QueryPlanMixin, APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated, CustomPermission]
-    required_permissions = ['view_user']
+    filterset_class = None
+    pagination_class = CustomPagination
+    always_paginate = False
+    keyset_pagination = False
+    envelope = None
+    stream_chunk_size = 500
+    # Listados calientes: se leen con .values_list() y se convierten sin el serializador.
+    fast_rows = False
+    row_annotations = {}
+    row_plan = None
+    # Datos de referencia que cambian poco: se sirven desde reference_cache.
+    cache_responses = False
+
+    def get_pagination(self):
+        if self.keyset_pagination and 'cursor' in self.request.query_params:
+            return KeysetPagination()
+        if self.always_paginate or 'pag' in self.request.query_params:
+            return self.pagination_class()
+        return None
+
+    def get_row_plan(self):
+        if not self.fast_rows:
+            return None
+        params = self.request.query_params
+        return compile_row_plan(type(self), params.get('fields'), params.get('expand'))
+
+    def serialize_chunk(self, items):
+        if self.row_plan:
+            return self.present(self.row_plan.rows(items))
+        return self.present(self.get_serializer(items, many=True).data)
+
+    def serialize_list(self, items):
+        return {self.envelope: self.serialize_chunk(items), **self.side_loaded()}
+
+    def side_loaded(self):
+        return {}
+
+    def iterate_chunks(self, queryset):
+        size = self.stream_chunk_size
+        if queryset.ordered:
+            chunk = []
+            for item in queryset.iterator(chunk_size=size):
+                chunk.append(item)
+                if len(chunk) == size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+            return
+
+        # Sin orden propio se avanza por clave primaria: mysqlclient no tiene
+        # cursores de servidor y .iterator() traería igual todas las filas.
+        queryset = queryset.order_by('pk')
+        pk_name = self.model._meta.pk.attname
+        last = None
+        while True:
+            chunk = list((queryset if last is None else queryset.filter(pk__gt=last))[:size])
+            if chunk:
+                yield chunk
+            if len(chunk) < size:
+                return
+            last = getattr(chunk[-1], pk_name)
+
+    def stream_list(self, queryset):
+        """Emite {"<envelope>": [...]} por bloques, con la memoria acotada a un bloque."""
+        renderer = JSONRenderer()
+        yield b'{' + renderer.render(self.envelope) + b':['
+        first = True
+        for chunk in self.iterate_chunks(queryset):
+            items = renderer.render(self.serialize_chunk(chunk))[1:-1]
+            if items:
+                yield items if first else b',' + items
+                first = False
+        yield b']'
+        for key, value in self.side_loaded().items():
+            yield b',' + renderer.render(key) + b':' + renderer.render(value)
+        yield b'}'
+
+    def filter_queryset(self, queryset):
+        if self.filterset_class and self.request.query_params:
+            queryset = self.filterset_class(self.request.query_params, queryset=queryset).qs
+        return queryset
+
+    def list_validators(self, queryset):
+        """ETag y Last-Modified del listado filtrado en una consulta, antes de serializar.
+
+        Salen de COUNT y MAX(updated_at), propios y de lo anidado, más los
+        parámetros de la petición. Una fila que sale del filtro no mueve el
+        máximo pero sí el conteo: If-None-Match lo nota y, si viene, manda
+        sobre If-Modified-Since.
+        """
+        if not has_updated_at(self.model, ''):
+            return None, None
+        fields = ['updated_at', *(f'{path}__updated_at' for path in self.version_paths())]
+        versions = queryset.order_by().aggregate(
+            rows=Count('pk', distinct=True),
+            **{f'version_{index}': Max(field) for index, field in enumerate(fields)}
+        )
+        rows = versions.pop('rows')
+        etag = make_etag(type(self).__name__, query_fingerprint(self.request), rows, *versions.values())
+        return etag, last_modified_from(versions.values())
+
+    def build_list_response(self, request, queryset):
+        self.row_plan = self.get_row_plan()
+        if self.row_plan:
+            queryset = self.row_plan.values(queryset)
+
+        pagination = self.get_pagination()
+        if pagination:
+            page = pagination.paginate_queryset(queryset, request)
+            return pagination.get_paginated_response(self.serialize_list(page))
+
+        if not self.renders_json(request):
+            return Response(self.serialize_list(list(queryset)))
+        return StreamingHttpResponse(self.stream_list(queryset), content_type='application/json')
+
+    def renders_json(self, request):
+        """Si el listado se puede emitir por bloques o cachear ya renderizado.
+
+        Ambos escriben JSON a mano: con otro renderer negociado (p. ej.
+        ?format=api) se responde con un Response normal.
+        """
+        return isinstance(getattr(request, 'accepted_renderer', None), JSONRenderer)
+
+    def cached_list_response(self, request):
+        """Datos de referencia: el JSON y sus validadores se guardan por versión del modelo y parámetros."""
+        key = reference_cache.response_key(self.model, request)
+        entry = reference_cache.get_response(key)
+        if entry is None:
+            queryset = self.filter_queryset(self.get_queryset())
+            etag, last_modified = self.list_validators(queryset)
+            response = not_modified(request, etag, last_modified)
+            if response:
+                return response
+            response = self.build_list_response(request, queryset)
+            body = b''.join(response.streaming_content) if response.streaming else JSONRenderer().render(response.data)
+            entry = (body, etag, last_modified)
+            reference_cache.set_response(key, entry)
+
+        body, etag, last_modified = entry
+        return (not_modified(request, etag, last_modified)
+                or with_validators(HttpResponse(body, content_type='application/json'), etag, last_modified))
 
     def get(self, request):
         try:
-            users = User.objects.all()
-            user_filter = UserFilter(request.query_params, queryset=users)
-            filtered_users = user_filter.qs
-            if 'pag' in request.query_params:
-                pagination = CustomPagination()
-                paginated_users = pagination.paginate_queryset(filtered_users, request)
-                serializer = UserSerializer(paginated_users, many=True)
-                return pagination.get_paginated_response({"users": serializer.data})     
-            serializer = UserSerializer(filtered_users, many=True)
-            return Response({"users": serializer.data})
+            if self.cache_responses and self.renders_json(request):
+                return self.cached_list_response(request)
+
+            # Con los validadores del cliente vigentes se responde 304 sin
+            # serializar nada, también en los listados que se emiten por bloques.
+            queryset = self.filter_queryset(self.get_queryset())
+            etag, last_modified = self.list_validators(queryset)
+            return (not_modified(request, etag, last_modified)
+                    or with_validators(self.build_list_response(request, queryset), etag, last_modified))
+
+        except APIException:
+            raise
+        except Exception as e:
+            return Response({
+                "data": {
+                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    "title": ["Se produjo un error interno"],
+                    "errors": str(e)
+                }
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ShowAPIView(QueryPlanMixin, APIView):
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [IsAuthenticated, CustomPermission]
+    not_found_message = "El ID no está registrado."
+
+    def get(self, request, pk):
+        try:
+            instance = self.get_queryset().filter(pk=pk).first()
+            if not instance:
+                return Response({
+                    "mensaje": self.not_found_message
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            etag, last_modified = self.instance_validators(instance)
+            return (not_modified(request, etag, last_modified)
+                    or with_validators(Response(self.present(self.get_serializer(instance).data)), etag, last_modified))
 
         except Exception as e:
             return Response({
@@ -101,8 +504,28 @@ class UserIndexAPIView(APIView):
                     "errors": str(e)
                 }
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
-    
+
+# Planes de carga compartidos por los recursos que anidan inventarios o usuarios.
+INVENTORY_RELATED = ('product__category', 'product__units')
+INVENTORY_PREFETCH = ('stripes',)
+# Inventory.available en SQL, para los listados que no instancian inventarios.
+INVENTORY_ROW_ANNOTATIONS = {
+    'available': F('quantity') - F('reserved_quantity') - F('striped_quantity') + Case(
+        When(hot_stripes__gt=0, then=Coalesce(Subquery(
+            StockStripe.objects.filter(inventory=OuterRef('pk')).order_by().values('inventory').annotate(total=Sum('quantity')).values('total')
+        ), 0)),
+        default=0,
+    ),
+}
+
+class UserIndexAPIView(IndexAPIView):
+    required_permissions = ['view_user']
+    model = User
+    serializer_class = UserSerializer
+    filterset_class = UserFilter
+    envelope = "users"
+    select_related = ('role',)
+
 class UserStoreAPIView(APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated, CustomPermission]
@@ -122,31 +545,13 @@ class UserStoreAPIView(APIView):
                 "details": str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class UserShowAPIView(APIView):
-    authentication_classes = [SessionAuthentication]
-    permission_classes = [IsAuthenticated, CustomPermission]
+class UserShowAPIView(ShowAPIView):
     required_permissions = ['view_user']
+    model = User
+    serializer_class = UserSerializer
+    not_found_message = "El ID de usuario no está registrado."
+    select_related = ('role',)
 
-    def get(self, request, pk):
-        try:
-            user = User.objects.filter(pk=pk).first()
-            if not user:
-                return Response({
-                    "mensaje": "El ID de usuario no está registrado."
-                }, status=status.HTTP_404_NOT_FOUND)
-            serializer = UserSerializer(user)
-            return Response(serializer.data)
-
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        
 class UserUpdateAPIView(APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated, CustomPermission]
@@ -211,7 +616,7 @@ class UserRestoreAPIView(APIView):
 
     def get(self, request, pk):
         try:
-            user = get_object_or_404(User, pk=pk, deleted_at__isnull=False)
+            user = get_object_or_404(User.deleted_objects, pk=pk)
             user.deleted_at = None
             user.save()
             return Response({"message": "¡Usuario restaurado exitosamente!"}, status=status.HTTP_200_OK)
@@ -224,34 +629,14 @@ class UserRestoreAPIView(APIView):
                 }
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class RoleIndexAPIView(APIView):
-    authentication_classes = [SessionAuthentication]
-    permission_classes = [IsAuthenticated, CustomPermission]
+class RoleIndexAPIView(IndexAPIView):
     required_permissions = ['view_role']
+    model = Role
+    serializer_class = RoleSerializer
+    filterset_class = RoleFilter
+    envelope = "roles"
+    cache_responses = True
 
-    def get(self, request):
-        try:
-            roles = Role.objects.all()
-            role_filter = RoleFilter(request.query_params, queryset=roles)
-            filtered_role = role_filter.qs
-
-            if 'pag' in request.query_params:
-                pagination = CustomPagination()
-                paginated_roles = pagination.paginate_queryset(filtered_role, request)
-                serializer = RoleSerializer(paginated_roles, many=True)
-                return pagination.get_paginated_response({"roles": serializer.data})
-            serializer = RoleSerializer(filtered_role, many=True)
-            return Response({"roles": serializer.data})
-        
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-          
 class RoleStoreAPIView(APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated, CustomPermission]
@@ -273,29 +658,11 @@ class RoleStoreAPIView(APIView):
                 }
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class RoleShowAPIView(APIView):
-    authentication_classes = [SessionAuthentication]
-    permission_classes = [IsAuthenticated, CustomPermission]
+class RoleShowAPIView(ShowAPIView):
     required_permissions = ['view_role']
-
-    def get(self, request, pk):
-        try:
-            role = Role.objects.filter(pk=pk).first()
-            if not role:
-                return Response({
-                    "mensaje": "El ID del rol no está registrado."
-                }, status=status.HTTP_404_NOT_FOUND)
-            serializer = RoleSerializer(role)
-            return Response(serializer.data)
-
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    model = Role
+    serializer_class = RoleSerializer
+    not_found_message = "El ID del rol no está registrado."
 
 class RoleUpdateAPIView(APIView):
     authentication_classes = [SessionAuthentication]
@@ -356,7 +723,7 @@ class RoleRestoreAPIView(APIView):
 
     def get(self, request, pk):
         try:
-            role = get_object_or_404(Role, pk=pk, deleted_at__isnull=False)
+            role = get_object_or_404(Role.deleted_objects, pk=pk)
             role.deleted_at = None
             role.save()
             return Response({"message": "¡Rol restaurado exitosamente!"}, status=status.HTTP_200_OK)
@@ -369,36 +736,14 @@ class RoleRestoreAPIView(APIView):
                 }
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class CategoryIndexAPIView(APIView):
-    authentication_classes = [SessionAuthentication]
-    permission_classes = [IsAuthenticated, CustomPermission]
+class CategoryIndexAPIView(IndexAPIView):
     required_permissions = 'view_category'
+    model = Category
+    serializer_class = CategorySerializer
+    filterset_class = CategoryFilter
+    envelope = "categories"
+    cache_responses = True
 
-    def get(self, request):
-        try:
-            categories = Category.objects.all()
-
-            if request.query_params:
-                category_filter = CategoryFilter(request.query_params, queryset=categories)
-                categories = category_filter.qs
-            if 'pag' in request.query_params:
-                pagination = CustomPagination()
-                paginated_categories = pagination.paginate_queryset(categories, request)
-                serializer = CategorySerializer(paginated_categories, many=True)
-                return pagination.get_paginated_response({"categories": serializer.data})
-            
-            serializer = CategorySerializer(categories, many=True)
-            return Response({"categories": serializer.data})
-        
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-          
 class CategoryStoreAPIView(APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated, CustomPermission]
@@ -420,30 +765,11 @@ class CategoryStoreAPIView(APIView):
                 }
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class CategoryShowAPIView(APIView):
-    authentication_classes = [SessionAuthentication]
-    permission_classes = [IsAuthenticated, CustomPermission]
+class CategoryShowAPIView(ShowAPIView):
     required_permissions = 'view_category'
-
-    def get(self, request, pk):
-        try:
-
-            category = Category.objects.filter(pk=pk).first()
-            if not category:
-                return Response({
-                    "mensaje": "El ID de la categoría no está registrado."
-                }, status=status.HTTP_404_NOT_FOUND)
-            serializer = CategorySerializer(category)
-            return Response(serializer.data)
-
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    model = Category
+    serializer_class = CategorySerializer
+    not_found_message = "El ID de la categoría no está registrado."
 
 class CategoryUpdateAPIView(APIView):
     authentication_classes = [SessionAuthentication]
@@ -502,7 +828,7 @@ class CategoryRestoreAPIView(APIView):
 
     def get(self, request, pk):
         try:
-            category = get_object_or_404(Category, pk=pk, deleted_at__isnull=False)
+            category = get_object_or_404(Category.deleted_objects, pk=pk)
             category.deleted_at = None
             category.save()
             return Response({"message": "¡Categoría restaurada exitosamente!"}, status=status.HTTP_200_OK)
@@ -515,37 +841,14 @@ class CategoryRestoreAPIView(APIView):
                 }
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-class UnitIndexAPIView(APIView):
-    authentication_classes = [SessionAuthentication]
-    permission_classes = [IsAuthenticated, CustomPermission]
+class UnitIndexAPIView(IndexAPIView):
     required_permissions = ['view_units']
+    model = Units
+    serializer_class = UnitSerializer
+    filterset_class = UnitFilter
+    envelope = "units"
+    cache_responses = True
 
-    def get(self, request):
-        try:
-            units = Units.objects.all()
-
-            if request.query_params:
-                unit_filter = UnitFilter(request.query_params, queryset=units)
-                units = unit_filter.qs
-
-            if 'pag' in request.query_params:
-                pagination = CustomPagination() 
-                paginated_units = pagination.paginate_queryset(units, request)
-                serializer = UnitSerializer(paginated_units, many=True)
-                return pagination.get_paginated_response({"units": serializer.data})
-            
-            serializer = UnitSerializer(units, many=True)
-            return Response({"units": serializer.data})
-        
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
 class UnitStoreAPIView(APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated, CustomPermission]
@@ -567,31 +870,12 @@ class UnitStoreAPIView(APIView):
                 }
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class UnitShowAPIView(APIView):
-    authentication_classes = [SessionAuthentication]
-    permission_classes = [IsAuthenticated, CustomPermission]
+class UnitShowAPIView(ShowAPIView):
     required_permissions = ['view_units']
+    model = Units
+    serializer_class = UnitSerializer
+    not_found_message = "El ID de la unidad no está registrado."
 
-    def get(self, request, pk):
-        try:
-            unit = Units.objects.filter(pk=pk).first()
-            if not unit:
-                return Response({
-                    "mensaje": "El ID de la unidad no está registrado."
-                }, status=status.HTTP_404_NOT_FOUND)
-
-            serializer = UnitSerializer(unit)
-            return Response(serializer.data)
-
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
 class UnitUpdateAPIView(APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated, CustomPermission]
@@ -653,7 +937,7 @@ class UnitRestoreAPIView(APIView):
 
     def get(self, request, pk):
         try:
-            unit = get_object_or_404(Units, pk=pk, deleted_at__isnull=False)
+            unit = get_object_or_404(Units.deleted_objects, pk=pk)
             unit.deleted_at = None
             unit.save()
             return Response({"message": "¡Unidad de medida restaurada exitosamente!"}, status=status.HTTP_200_OK)
@@ -666,37 +950,14 @@ class UnitRestoreAPIView(APIView):
                 }
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class CoinIndexAPIView(APIView):
-    authentication_classes = [SessionAuthentication]
-    permission_classes = [IsAuthenticated, CustomPermission]
+class CoinIndexAPIView(IndexAPIView):
     required_permissions = ['view_coin']
+    model = Coin
+    serializer_class = CoinSerializer
+    filterset_class = CoinFilter
+    envelope = "coins"
+    cache_responses = True
 
-    def get(self, request):
-        try:
-            coins = Coin.objects.all()
-
-            if request.query_params:
-                coin_filter = CoinFilter(request.query_params, queryset=coins)
-                coins = coin_filter.qs
-
-            if 'pag' in request.query_params:
-                pagination = CustomPagination()
-                paginated_coins = pagination.paginate_queryset(coins, request)
-                serializer = CoinSerializer(paginated_coins, many=True)
-                return pagination.get_paginated_response({"coins": serializer.data})
-            
-            serializer = CoinSerializer(coins, many=True)
-            return Response({"coins": serializer.data})
-        
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
 class CoinStoreAPIView(APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated, CustomPermission]
@@ -718,31 +979,12 @@ class CoinStoreAPIView(APIView):
                 }
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-class CoinShowAPIView(APIView):
-    authentication_classes = [SessionAuthentication]
-    permission_classes = [IsAuthenticated, CustomPermission]
+class CoinShowAPIView(ShowAPIView):
     required_permissions = ['view_coin']
+    model = Coin
+    serializer_class = CoinSerializer
+    not_found_message = "El ID de la moneda no está registrado."
 
-    def get(self, request, pk):
-        try:
-            coin = Coin.objects.filter(pk=pk).first()
-            if not coin:
-                return Response({
-                    "mensaje": "El ID de la moneda no está registrado."
-                }, status=status.HTTP_404_NOT_FOUND)
-
-            serializer = CoinSerializer(coin)
-            return Response(serializer.data)
-
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
 class CoinUpdateAPIView(APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated, CustomPermission]
@@ -796,7 +1038,7 @@ class CoinRestoreAPIView(APIView):
 
     def get(self, request, pk):
         try:
-            coin = get_object_or_404(Coin, pk=pk, deleted_at__isnull=False)
+            coin = get_object_or_404(Coin.deleted_objects, pk=pk)
             coin.deleted_at = None
             coin.save()
             return Response({"message": "¡Moneda restaurada exitosamente!"}, status=status.HTTP_200_OK)
@@ -809,45 +1051,14 @@ class CoinRestoreAPIView(APIView):
                 }
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-class ProductIndexAPIView(APIView):
-    authentication_classes = [SessionAuthentication]
-    permission_classes = [IsAuthenticated, CustomPermission]
+class ProductIndexAPIView(IndexAPIView):
     required_permissions = ['view_product']
-
-    def get(self, request):
-        try:
-            products = Product.objects.all()
-
-            if request.query_params:
-                product_filter = ProductFilter(request.query_params, queryset=products)
-                products = product_filter.qs
-                
-            if 'pag' in request.query_params:
-                pagination = CustomPagination()
-                paginated_products = pagination.paginate_queryset(products, request)
-                serializer = ProductSerializer(paginated_products, many=True)
-            else:
-                serializer = ProductSerializer(products, many=True)
-
-            for product_data in serializer.data:
-                image_name = product_data.pop('img', None)  
-                if image_name:
-                    image_url = settings.PRODUCT_IMAGE_BASE_URL + str(image_name)
-                    product_data['image_url'] = image_url
-
-            if 'pag' in request.query_params:
-                return pagination.get_paginated_response({"products": serializer.data})
-            else:
-                return Response({"products": serializer.data})
-        
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    model = Product
+    serializer_class = ProductSerializer
+    filterset_class = ProductFilter
+    envelope = "products"
+    select_related = ('category', 'units')
+    fast_rows = True
 
 class ProductStoreAPIView(APIView):
     authentication_classes = [SessionAuthentication]
@@ -902,30 +1113,31 @@ class ProductStoreAPIView(APIView):
                 }
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-class ProductShowAPIView(APIView):
-    authentication_classes = [SessionAuthentication]
-    permission_classes = [IsAuthenticated, CustomPermission]
+class ProductShowAPIView(ShowAPIView):
     required_permissions = ['view_product']
+    model = Product
+    serializer_class = ProductSerializer
+    select_related = ('category', 'units')
 
     def get(self, request, pk):
         try:
-            product = Product.objects.get(pk=pk)
+            product = self.get_queryset().get(pk=pk)
         except Product.DoesNotExist:
             raise Http404("El producto no existe")
 
-        serializer = ProductSerializer(product)
-        product_data = serializer.data
+        etag, last_modified = self.instance_validators(product)
+        response = not_modified(request, etag, last_modified)
+        if response:
+            return response
 
-        image_name = product_data.pop('img', None) 
-        if image_name:
-            image_url = settings.PRODUCT_IMAGE_BASE_URL + str(image_name)
-            product_data['image_url'] = image_url
-            return Response(product_data)
-        else:
+        serializer = self.get_serializer(product)
+        if not product.img and 'image_url' in serializer.fields:
             return Response({
                 "mensaje": "El campo 'img' no está presente en los datos del producto."
             }, status=status.HTTP_404_NOT_FOUND)
 
+        return with_validators(Response(serializer.data), etag, last_modified)
+
 class ProductUpdateAPIView(APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated, CustomPermission]
@@ -976,7 +1188,10 @@ class ProductUpdateAPIView(APIView):
             if (value not in ('', 'null') and value is not None) and hasattr(product, field):
                      setattr(product, field, value)
 
-        product.save()
+        with transaction.atomic():
+            product.save()
+            if data.get('price') not in ('', 'null', None):
+                revalue_inventories(Inventory.all_objects.filter(product_id=product.pk))
         
         serializer = ProductSerializer(product)
         return Response(serializer.data)
@@ -1007,7 +1222,7 @@ class ProductRestoreAPIView(APIView):
 
     def get(self, request, pk):
         try:
-            product = get_object_or_404(Product, pk=pk, deleted_at__isnull=False)
+            product = get_object_or_404(Product.deleted_objects, pk=pk)
             product.deleted_at = None
             product.save()
             return Response({"message": "¡Producto restaurado exitosamente!"}, status=status.HTTP_200_OK)
@@ -1020,94 +1235,67 @@ class ProductRestoreAPIView(APIView):
                 }
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-class InventoryIndexAPIView(APIView):
-    authentication_classes = [SessionAuthentication]
-    permission_classes = [IsAuthenticated, CustomPermission]
+class InventoryIndexAPIView(IndexAPIView):
     required_permissions = ['view_inventory']
+    model = Inventory
+    serializer_class = InventorySerializer
+    filterset_class = InventoryFilter
+    envelope = "inventories"
+    select_related = INVENTORY_RELATED
+    prefetch_related = INVENTORY_PREFETCH
+    fast_rows = True
+    row_annotations = INVENTORY_ROW_ANNOTATIONS
+
+class InventoryLowStockAPIView(IndexAPIView):
+    required_permissions = ['view_inventory']
+    model = Inventory
+    serializer_class = InventorySerializer
+    select_related = INVENTORY_RELATED
+    prefetch_related = INVENTORY_PREFETCH
+    pagination_class = LowStockPagination
+    always_paginate = True
+    envelope = "inventories"
+    fast_rows = True
+    row_annotations = INVENTORY_ROW_ANNOTATIONS
+
+    def get_queryset(self):
+        return super().get_queryset().filter(below_min=True)
+
+    def filter_queryset(self, queryset):
+        return queryset
 
-    def get(self, request):
-        try:
-            inventories = Inventory.objects.all()
-
-            if request.query_params:
-                inventory_filter = InventoryFilter(request.query_params, queryset=inventories)
-                inventories = inventory_filter.qs
-                
-            if 'pag' in request.query_params:
-                pagination = CustomPagination()
-                paginated_inventories = pagination.paginate_queryset(inventories, request)
-                serializer = InventorySerializer(paginated_inventories, many=True)
-            else:
-                serializer = InventorySerializer(inventories, many=True)
-
-            for inventory_data in serializer.data:
-                product_data = inventory_data.get('product')
-                if product_data and 'img' in product_data:
-
-                    product_data['image_url'] = settings.PRODUCT_IMAGE_BASE_URL + str(product_data['img'])
-
-                    product_data.pop('img')
-
-            if 'pag' in request.query_params:
-                return pagination.get_paginated_response({"inventories": serializer.data})
-            else:
-                return Response({"inventories": serializer.data})
-        
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
 class InventoryAddInputAPIView(APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated, CustomPermission]
     required_permissions = ['add_inventory'] 
 
+    @idempotent
     def post(self, request):
         product_id = request.data.get('product_id')
         quantity = request.data.get('quantity')
 
-        if not Product.objects.filter(id=product_id).exists():
-            return Response({"message": "Este producto no existe."}, status=status.HTTP_404_NOT_FOUND)
-
         try:
-            inventory = Inventory.objects.get(product_id=product_id)
-            inventory.quantity += quantity
+            current_quantity, total_price, created = add_stock(product_id, quantity)
+        except StockError as e:
+            return Response(e.detail, status=e.status_code)
 
-            product_price = inventory.product.price
-            inventory.total_price = product_price * inventory.quantity
+        if created:
+            return Response({"message": f"¡Producto agregado exitosamente! Cantidad mínima establecida por default es 5, actualizala.", "Cantidad actual": current_quantity, "Precio total": total_price}, status=status.HTTP_201_CREATED)
+        return Response({"message": "¡El inventario se actualizó exitosamente!", "Cantidad actual": current_quantity, }, status=status.HTTP_200_OK)
 
-            if inventory.quantity >= inventory.min_quantity:
-                warning_message = ""
-            else:
-                warning_message = f"¡La cantidad del producto {inventory.product.name} ha alcanzado o superado {inventory.min_quantity} unidades!"
-
-            inventory.save()
-
-            Input.objects.create(
-                inventory=inventory,
-                quantity=quantity
-            )
-
-            return Response({"message": "¡El inventario se actualizó exitosamente!", "Cantidad actual": inventory.quantity, }, status=status.HTTP_200_OK)
-        except Inventory.DoesNotExist:
-            product = Product.objects.get(id=product_id)
-            inventory = Inventory.objects.create(product=product, quantity=quantity, min_quantity=5)
-
-            product_price = inventory.product.price
-            inventory.total_price = product_price * inventory.quantity
+class InventoryAddBatchInputAPIView(APIView):
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [IsAuthenticated, CustomPermission]
+    required_permissions = ['add_inventory'] 
 
-            inventory.save()
+    @idempotent
+    def post(self, request):
+        try:
+            results = receive(request.data.get('products', []))
+        except StockError as e:
+            return Response(e.detail, status=e.status_code)
 
-            Input.objects.create(
-                inventory=inventory,
-                quantity=quantity
-            )
-            return Response({"message": f"¡Producto agregado exitosamente! Cantidad mínima establecida por default es 5, actualizala.", "Cantidad actual": inventory.quantity, "Precio total": inventory.total_price}, status=status.HTTP_201_CREATED)
+        return Response({"message": "¡El inventario se actualizó exitosamente!", "products": results}, status=status.HTTP_200_OK)
 
 class InventoryAddMinQuantityInputAPIView(APIView):
     authentication_classes = [SessionAuthentication]
@@ -1116,18 +1304,15 @@ class InventoryAddMinQuantityInputAPIView(APIView):
 
     def post(self, request):
         product_id = request.data.get('product_id')
-        min_quantity = request.data.get('min_quantity')
 
         try:
-            inventory = Inventory.objects.get(product_id=product_id)
-            inventory.min_quantity = min_quantity
-            inventory.save()
+            min_quantity, created = set_min_quantity(product_id, request.data.get('min_quantity'))
+        except StockError as e:
+            return Response(e.detail, status=e.status_code)
 
-            return Response({"message": f"¡Se ha actualizado el min_quantity del inventario del producto con ID {product_id} exitosamente!", "Nuevo min_quantity": inventory.min_quantity}, status=status.HTTP_200_OK)
-        except Inventory.DoesNotExist:
-
-            inventory = Inventory.objects.create(product_id=product_id, quantity=0, min_quantity=min_quantity)
-            return Response({"message": f"¡Se ha creado un nuevo inventario para el producto con ID {product_id}!", "Nuevo min_quantity": inventory.min_quantity}, status=status.HTTP_201_CREATED)
+        if created:
+            return Response({"message": f"¡Se ha creado un nuevo inventario para el producto con ID {product_id}!", "Nuevo min_quantity": min_quantity}, status=status.HTTP_201_CREATED)
+        return Response({"message": f"¡Se ha actualizado el min_quantity del inventario del producto con ID {product_id} exitosamente!", "Nuevo min_quantity": min_quantity}, status=status.HTTP_200_OK)
         
 class InventoryUpdateMinQuantityAPIView(APIView):
     authentication_classes = [SessionAuthentication]
@@ -1147,343 +1332,326 @@ class InventoryUpdateMinQuantityAPIView(APIView):
         except Inventory.DoesNotExist:
             return Response({"message": f"El inventario con ID {inventory_id} no existe"}, status=status.HTTP_404_NOT_FOUND)
 
+def get_or_create_client(data):
+    """Busca el cliente por documento o lo registra. Devuelve (usuario, errores)."""
+    document = data.get('document')
+    current_user = User.all_objects.filter(document=document).first()
+    if current_user:
+        return current_user, None
+
+    user_data = {
+        "username": document, 
+        "email": data.get('email'),
+        "document": document,
+        "address": data.get('address'),
+        "phone_number": data.get('phone_number'),
+        "name": data.get('name'),
+        "last_name": data.get('last_name')
+    }
+    user_serializer = UserRegisterClientSerializer(data=user_data)
+    if user_serializer.is_valid():
+        return user_serializer.save(), None
+    return None, user_serializer.errors
+
 class InventorySubOutputAPIView(APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated, CustomPermission]
     required_permissions = ['add_inventory']  
 
+    @idempotent
     def post(self, request):
         products = request.data.get('products', [])
         try:
-            document = request.data.get('document')
-            existing_user = User.objects.filter(document=document).exists()
+            with transaction.atomic():
+                current_user, errors = get_or_create_client(request.data)
+                if errors:
+                    return Response(errors, status=status.HTTP_400_BAD_REQUEST)
 
-            if existing_user:
-                current_user = User.objects.get(document=document)
-            else:
-                user_data = {
-                    "username": document, 
-                    "email": request.data.get('email'),
-                    "document": document,
-                    "address": request.data.get('address'),
-                    "phone_number": request.data.get('phone_number'),
-                    "name": request.data.get('name'),
-                    "last_name": request.data.get('last_name')
-                }
-                user_serializer = UserRegisterClientSerializer(data=user_data)
-                if user_serializer.is_valid():
-                    current_user = user_serializer.save()
+                if request.data.get('mode', settings.CHECKOUT_MODE) == 'queued':
+                    pending, inventories = enqueue_checkout(current_user, products)
                 else:
-                    return Response(user_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-                
-            bill_details = []
-            total_price = Decimal(0)
-            
-            for product in products:
-                product_id = product.get('product_id')
-                quantity = product.get('quantity')
-
-                inventory = Inventory.objects.get(product_id=product_id)
-                if inventory.quantity < quantity:
-                    return Response({"message": f"La cantidad solicitada para el producto {inventory.product.name} es mayor que la cantidad en inventario", "cantidad existente": inventory.quantity}, status=status.HTTP_400_BAD_REQUEST)
-
-                inventory.quantity -= quantity
-                inventory.total_price = inventory.product.price * inventory.quantity
-                inventory.save()  
-
-                Output.objects.create(
-                    inventory=inventory,
-                    quantity=quantity
-                )
-
-                subtotal = inventory.product.price * quantity
-                total_price += subtotal
-
-                bill_detail = {
-                    'inventory': inventory,
-                    'quantity': quantity,
-                    'price_unit': inventory.product.price,
-                    'subtotal': subtotal,
-                }
-
-                bill_details.append(bill_detail)
-
-                if inventory.quantity <= inventory.min_quantity:
-                    warning_message = f"¡La cantidad del producto {inventory.product.name} ha llegado al mínimo de {inventory.min_quantity}!"
-                else:
-                    warning_message = ""
-
-            bill = Bill.objects.create(
-                user=current_user,
-                total_price=total_price,
-                date=timezone.now() 
-            )
-
-            for detail in bill_details:
-                Detail.objects.create(
-                    bill=bill,
-                    inventory=detail['inventory'],
-                    quantity=detail['quantity'],
-                    price_unit=detail['price_unit'],
-                    subtotal=detail['subtotal']
-                )
-
-            response_data = {"message": "Inventario actualizado satisfactoriamente!", "total_price": total_price}
-            if warning_message:
-                response_data["Advertencia"] = warning_message
-
-            return Response(response_data, status=status.HTTP_200_OK)
-        except Inventory.DoesNotExist:
-            return Response({"message": f"Uno de los productos no existe en el inventario"}, status=status.HTTP_404_NOT_FOUND)
-
-class InventoryShowAPIView(APIView):
-    authentication_classes = [SessionAuthentication]
-    permission_classes = [IsAuthenticated, CustomPermission]
-    required_permissions = ['view_inventory']
-
-    def get(self, request, pk):
-        try:
-
-            inventory = Inventory.objects.filter(pk=pk).first()
-            
-            if not inventory:
-                return Response({
-                    "mensaje": "El ID del inventario no está registrado."
-                }, status=status.HTTP_404_NOT_FOUND)
-
-            inventory_serializer = InventorySerializer(inventory)
+                    bill, inventories = checkout(current_user, products)
+        except StockError as e:
+            return Response(e.detail, status=e.status_code)
+
+        if request.data.get('mode', settings.CHECKOUT_MODE) == 'queued':
+            response_data = {
+                "message": "Venta registrada, la factura se generará en breve.",
+                "total_price": pending.total_price,
+                "provisional_number": pending.provisional_number,
+                "pending_checkout_id": pending.pk
+            }
+            response_status = status.HTTP_202_ACCEPTED
+        else:
+            response_data = {"message": "Inventario actualizado satisfactoriamente!", "total_price": bill.total_price}
+            response_status = status.HTTP_200_OK
+        warnings = stock_warnings(inventories)
+        if warnings:
+            response_data["Advertencia"] = " ".join(warnings)
 
-            return Response(inventory_serializer.data)
+        return Response(response_data, status=response_status)
 
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
-class InputIndexAPIView(APIView):
+class ReservationStoreAPIView(APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated, CustomPermission]
-    required_permissions = ['view_input']
+    required_permissions = ['add_inventory']
 
-    def get(self, request):
+    @idempotent
+    def post(self, request):
+        products = request.data.get('products', [])
         try:
-            inputs = Input.objects.all()
-
-            if request.query_params:
-                input_filter = InputFilter(request.query_params, queryset=inputs)
-                inputs = input_filter.qs
-
-            if 'pag' in request.query_params:
-                pagination = CustomPagination()
-                paginated_inputs = pagination.paginate_queryset(inputs, request)
-                serializer = InputSerializer(paginated_inputs, many=True)
-                return pagination.get_paginated_response({"inputs": serializer.data})
-
-            serializer = InputSerializer(inputs, many=True)
-            return Response({"inputs": serializer.data})
-
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-class InputShowAPIView(APIView):
+            with transaction.atomic():
+                current_user = None
+                if request.data.get('document'):
+                    current_user, errors = get_or_create_client(request.data)
+                    if errors:
+                        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+                reservation, _ = reserve(current_user, products, request.data.get('ttl'))
+        except StockError as e:
+            return Response(e.detail, status=e.status_code)
+
+        return Response({
+            "message": "Reserva creada satisfactoriamente!",
+            "reservation": ReservationSerializer(reservation).data
+        }, status=status.HTTP_201_CREATED)
+
+class ReservationConfirmAPIView(APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated, CustomPermission]
-    required_permissions = ['view_input']
+    required_permissions = ['add_inventory']
 
-    def get(self, request, pk):
+    @idempotent
+    def post(self, request, pk):
         try:
-            input_obj = Input.objects.filter(pk=pk).first()
-            if not input_obj:
-                return Response({
-                    "mensaje": "El ID de la entrada no está registrado."
-                }, status=status.HTTP_404_NOT_FOUND)
-
-            serializer = InputSerializer(input_obj)
-            return Response(serializer.data)
-
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
-class OutputIndexAPIView(APIView):
+            with transaction.atomic():
+                current_user = None
+                if request.data.get('document'):
+                    current_user, errors = get_or_create_client(request.data)
+                    if errors:
+                        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+                reservation, inventories = confirm_reservation(pk, current_user)
+        except StockError as e:
+            return Response(e.detail, status=e.status_code)
+
+        response_data = {
+            "message": "Reserva confirmada satisfactoriamente!",
+            "total_price": reservation.bill.total_price,
+            "reservation": ReservationSerializer(reservation).data
+        }
+        warnings = stock_warnings(inventories)
+        if warnings:
+            response_data["Advertencia"] = " ".join(warnings)
+
+        return Response(response_data, status=status.HTTP_200_OK)
+
+class ReservationReleaseAPIView(APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated, CustomPermission]
-    required_permissions = ['view_output']
+    required_permissions = ['add_inventory']
 
-    def get(self, request):
+    @idempotent
+    def post(self, request, pk):
         try:
-            outputs = Output.objects.all()
-
-            if request.query_params:
-                output_filter = OutputFilter(request.query_params, queryset=outputs)
-                outputs = output_filter.qs
+            reservation = release_reservation(pk)
+        except StockError as e:
+            return Response(e.detail, status=e.status_code)
 
-            if 'pag' in request.query_params:
-                pagination = CustomPagination()
-                paginated_outputs = pagination.paginate_queryset(outputs, request)
-                serializer = OutputSerializer(paginated_outputs, many=True)
-                return pagination.get_paginated_response({"outputs": serializer.data})
+        return Response({
+            "message": "Reserva liberada satisfactoriamente!",
+            "reservation": ReservationSerializer(reservation).data
+        }, status=status.HTTP_200_OK)
 
-            serializer = OutputSerializer(outputs, many=True)
-            return Response({"outputs": serializer.data})
+class PendingCheckoutShowAPIView(ShowAPIView):
+    required_permissions = ['view_bill']
+    model = PendingCheckout
+    serializer_class = PendingCheckoutSerializer
+    not_found_message = "El ID de la venta en cola no está registrado."
 
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+class InventoryShowAPIView(ShowAPIView):
+    required_permissions = ['view_inventory']
+    model = Inventory
+    serializer_class = InventorySerializer
+    not_found_message = "El ID del inventario no está registrado."
+    select_related = INVENTORY_RELATED
+    prefetch_related = INVENTORY_PREFETCH
 
-class OutputShowAPIView(APIView):
+class InventoryAsOfAPIView(APIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [IsAuthenticated, CustomPermission]
-    required_permissions = ['view_output']
+    required_permissions = ['view_inventory']
 
     def get(self, request, pk):
+        value = request.query_params.get('date', '')
         try:
-            Output_obj = Output.objects.filter(pk=pk).first()
-            if not Output_obj:
-                return Response({
-                    "mensaje": "El ID de la salida no está registrado."
-                }, status=status.HTTP_404_NOT_FOUND)
-
-            serializer = OutputSerializer(Output_obj)
-            return Response(serializer.data)
+            day = parse_date(value)
+            moment = None if day else parse_datetime(value)
+        except ValueError:
+            day = moment = None
+
+        if day:
+            # Una fecha sin hora pide el stock al cierre de ese día.
+            moment = datetime.combine(day + timedelta(days=1), time.min)
+            inclusive = False
+        elif moment:
+            inclusive = True
+        else:
+            return Response({"message": "El parámetro 'date' debe tener el formato AAAA-MM-DD o ser una fecha y hora ISO 8601."}, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
 
-        except Exception as e:
+        inventory = Inventory.all_objects.filter(pk=pk).values('id', 'product_id').first()
+        if not inventory:
             return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-       
-        
-class BillIndexAPIView(APIView):
-    authentication_classes = [SessionAuthentication]
-    permission_classes = [IsAuthenticated, CustomPermission]
-    required_permissions = ['view_bill']
-
-    def get(self, request):
-        try:
-            bills = Bill.objects.all()
-            
-            if request.query_params:
-                bill_filter = BillFilter(request.query_params, queryset=bills)
-                bills = bill_filter.qs
+                "mensaje": "El ID del inventario no está registrado."
+            }, status=status.HTTP_404_NOT_FOUND)
 
-            if 'pag' in request.query_params:
-                pagination = CustomPagination()
-                paginated_bills = pagination.paginate_queryset(bills, request)
-                serializer = BillIndexSerializer(paginated_bills, many=True)
-                return pagination.get_paginated_response({"bills": serializer.data})
+        return Response({
+            "inventory_id": inventory['id'],
+            "product_id": inventory['product_id'],
+            "date": value,
+            "quantity": quantity_as_of(pk, moment, inclusive)
+        })
 
-            serializer = BillIndexSerializer(bills, many=True)
-            return Response({"bills": serializer.data})
+class InputIndexAPIView(IndexAPIView):
+    required_permissions = ['view_input']
+    model = Input
+    serializer_class = InputSerializer
+    filterset_class = InputFilter
+    envelope = "inputs"
+    keyset_pagination = True
+    select_related = tuple(f'inventory__{related}' for related in INVENTORY_RELATED)
+    prefetch_related = tuple(f'inventory__{related}' for related in INVENTORY_PREFETCH)
+
+class InputShowAPIView(ShowAPIView):
+    required_permissions = ['view_input']
+    model = Input
+    serializer_class = InputSerializer
+    not_found_message = "El ID de la entrada no está registrado."
+    select_related = tuple(f'inventory__{related}' for related in INVENTORY_RELATED)
+    prefetch_related = tuple(f'inventory__{related}' for related in INVENTORY_PREFETCH)
 
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+class OutputIndexAPIView(IndexAPIView):
+    required_permissions = ['view_output']
+    model = Output
+    serializer_class = OutputSerializer
+    filterset_class = OutputFilter
+    envelope = "outputs"
+    keyset_pagination = True
+    select_related = tuple(f'inventory__{related}' for related in INVENTORY_RELATED)
+    prefetch_related = tuple(f'inventory__{related}' for related in INVENTORY_PREFETCH)
+
+class OutputShowAPIView(ShowAPIView):
+    required_permissions = ['view_output']
+    model = Output
+    serializer_class = OutputSerializer
+    not_found_message = "El ID de la salida no está registrado."
+    select_related = tuple(f'inventory__{related}' for related in INVENTORY_RELATED)
+    prefetch_related = tuple(f'inventory__{related}' for related in INVENTORY_PREFETCH)
 
-class BillShowAPIView(APIView):
-    authentication_classes = [SessionAuthentication]
-    permission_classes = [IsAuthenticated, CustomPermission]
+class BillIndexAPIView(IndexAPIView):
     required_permissions = ['view_bill']
+    model = Bill
+    serializer_class = BillIndexSerializer
+    filterset_class = BillFilter
+    envelope = "bills"
+    keyset_pagination = True
+    select_related = ('user__role',)
+    prefetch_related = (
+        Prefetch('details', queryset=Detail.objects.select_related(
+            *(f'inventory__{related}' for related in INVENTORY_RELATED)
+        )),
+        *(f'details__inventory__{related}' for related in INVENTORY_PREFETCH),
+    )
+
+    # ?view=flat: cada detalle solo referencia su producto y cada factura su
+    # usuario; usuarios y productos viajan una sola vez por página.
+    flat_prefetch_related = (
+        Prefetch('details', queryset=Detail.objects.select_related('inventory').order_by('id')),
+    )
+
+    def is_flat(self):
+        return self.request.query_params.get('view') == 'flat'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.is_flat():
+            # El inventario de cada detalle solo hace falta para su product_id.
+            self.select_related = ()
+            self.prefetch_related = self.flat_prefetch_related
+            self.plan_fields = {**self.plan_fields, 'inventory': 'product_id'}
+
+    def get_queryset(self):
+        if self.is_flat():
+            self.user_ids = set()
+            self.product_ids = set()
+        return super().get_queryset()
+
+    def version_paths(self):
+        paths = super().version_paths()
+        if not self.is_flat():
+            return paths
+        # Usuarios y productos viajan aparte, pero sus cambios también cuentan.
+        sparse = self.sparse()
+        side_loaded = []
+        if sparse is None or 'user_id' in sparse:
+            side_loaded += ['user', 'user__role']
+        if 'details__inventory' in paths:
+            side_loaded += [f'details__inventory__{related}' for related in ('product', *INVENTORY_RELATED)]
+        return sorted(path for path in {*paths, *side_loaded} if has_updated_at(self.model, path))
+
+    def serialize_chunk(self, items):
+        if not self.is_flat():
+            return super().serialize_chunk(items)
+
+        bills = BillListSerializer(items, many=True, sparse=self.sparse()).data
+        self.user_ids.update(bill['user_id'] for bill in bills if bill.get('user_id'))
+        self.product_ids.update(detail['product_id'] for bill in bills for detail in bill.get('details', ()) if isinstance(detail, dict) and detail.get('product_id'))
+        return bills
+
+    def side_loaded(self):
+        if not self.is_flat():
+            return {}
+
+        users = User.all_objects.filter(pk__in=self.user_ids).select_related('role').order_by('id')
+        products = Product.all_objects.filter(pk__in=self.product_ids).select_related('category', 'units').order_by('id')
+        return {
+            "users": UserSerializer(users, many=True).data,
+            "products": ProductSerializer(products, many=True).data,
+        }
+
+class BillShowAPIView(ShowAPIView):
+    required_permissions = ['view_bill']
+    model = Bill
+    serializer_class = BillSerializer
+    not_found_message = "El ID de la salida no está registrado."
+    select_related = ('user__role',)
 
-    def get(self, request, pk):
-        try:
-            Bill_obj = Bill.objects.filter(pk=pk).first()
-            if not Bill_obj:
-                return Response({
-                    "mensaje": "El ID de la salida no está registrado."
-                }, status=status.HTTP_404_NOT_FOUND)
-
-            serializer = BillSerializer(Bill_obj)
-            return Response(serializer.data)
-
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-     
-class DetailIndexAPIView(APIView):
-    authentication_classes = [SessionAuthentication]
-    permission_classes = [IsAuthenticated, CustomPermission]
+class DetailIndexAPIView(IndexAPIView):
     required_permissions = ['view_detail']
-
-    def get(self, request):
-        try:
-            details = Detail.objects.all()
-
-            if request.query_params:
-                Detail_filter = DetailFilter(request.query_params, queryset=details)
-                details = Detail_filter.qs
-
-            if 'pag' in request.query_params:
-                pagination = CustomPagination()
-                paginated_details = pagination.paginate_queryset(details, request)
-                serializer = DetailSerializer(paginated_details, many=True)
-                return pagination.get_paginated_response({"details": serializer.data})
-
-            serializer = DetailSerializer(details, many=True)
-            return Response({"details": serializer.data})
-
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-class DetailShowAPIView(APIView):
-    authentication_classes = [SessionAuthentication]
-    permission_classes = [IsAuthenticated, CustomPermission]
+    model = Detail
+    serializer_class = DetailSerializer
+    filterset_class = DetailFilter
+    envelope = "details"
+    keyset_pagination = True
+    select_related = ('bill__user__role', *(f'inventory__{related}' for related in INVENTORY_RELATED))
+    prefetch_related = tuple(f'inventory__{related}' for related in INVENTORY_PREFETCH)
+
+class DetailShowAPIView(ShowAPIView):
     required_permissions = ['view_detail']
-    def get(self, request, pk):
-        try:
-            Detail_obj = Detail.objects.filter(pk=pk).first()
-            if not Detail_obj:
-                return Response({
-                    "mensaje": "El ID de la salida no está registrado."
-                }, status=status.HTTP_404_NOT_FOUND)
+    model = Detail
+    serializer_class = DetailSerializer
+    not_found_message = "El ID de la salida no está registrado."
+    select_related = ('bill__user__role', *(f'inventory__{related}' for related in INVENTORY_RELATED))
+    prefetch_related = tuple(f'inventory__{related}' for related in INVENTORY_PREFETCH)
+
+class DailyMovementIndexAPIView(IndexAPIView):
+    required_permissions = ['view_input', 'view_output']
+    model = DailyMovement
+    serializer_class = DailyMovementSerializer
+    filterset_class = DailyMovementFilter
+    envelope = "daily_movements"
+    select_related = ('inventory',)
+    ordering = ('day', 'inventory_id')
 
-            serializer = DetailSerializer(Detail_obj)
-            return Response(serializer.data)
-
-        except Exception as e:
-            return Response({
-                "data": {
-                    "code": status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    "title": ["Se produjo un error interno"],
-                    "errors": str(e)
-                }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
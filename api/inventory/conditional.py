@@ -0,0 +1,37 @@
+import hashlib
+from urllib.parse import urlencode
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def query_fingerprint(request):
+    """Parámetros de la petición en orden estable, con esquema y host (los enlaces de paginación son absolutos)."""
+    params = urlencode(sorted((name, value) for name, values in request.query_params.lists() for value in values))
+    return f'{request.scheme}://{request.get_host()}?{params}'
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest())
+
+
+def last_modified_from(versions):
+    versions = [version for version in versions if version is not None]
+    return int(max(versions).timestamp()) if versions else None
+
+
+def with_validators(response, etag, last_modified):
+    if etag:
+        response.headers['ETag'] = etag
+    if last_modified:
+        response.headers['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def not_modified(request, etag, last_modified):
+    """304 con sus validadores si If-None-Match / If-Modified-Since coinciden, o None."""
+    if not etag:
+        return None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        return None
+    return with_validators(response, etag, last_modified)
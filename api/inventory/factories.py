@@ -0,0 +1,64 @@
+from decimal import Decimal
+from django.contrib.auth.models import Permission
+from django.utils import timezone
+from .models import *
+
+# Datos de prueba compartidos por los tests y por los comandos de verificación.
+
+
+def create_admin(name):
+    """Usuario con un rol que tiene todos los permisos."""
+    role = Role.objects.create(name=name)
+    RolePermission.objects.bulk_create([RolePermission(role=role, permission=permission) for permission in Permission.objects.all()])
+    return User.objects.create(
+        username=name, email=f"{name}@example.com", document=name, address='-', phone_number='-', role=role
+    )
+
+
+def create_product(name, price=Decimal('1.50')):
+    category = Category.objects.create(name=name)
+    units = Units.objects.create(name=name, abbreviation=name[:10])
+    return Product.objects.create(name=name, price=price, category=category, units=units, img=f"{name}.png")
+
+
+def create_inventory(name, quantity, min_quantity=0, price=1):
+    product = create_product(name, Decimal(price))
+    return Inventory.objects.create(product=product, quantity=quantity, total_price=product.price * quantity, min_quantity=min_quantity)
+
+
+def delete_inventory(inventory):
+    """Borra de verdad el inventario de create_inventory con sus ventas, reservas y movimientos."""
+    bill_ids = list(Detail.all_objects.filter(inventory=inventory).values_list('bill_id', flat=True))
+    reservation_ids = list(ReservationLine.objects.filter(inventory=inventory).values_list('reservation_id', flat=True))
+    PendingCheckout.objects.filter(reservation_id__in=reservation_ids).delete()
+    Reservation.objects.filter(pk__in=reservation_ids).delete()
+    Detail.all_objects.filter(inventory=inventory).delete()
+    Bill.all_objects.filter(pk__in=bill_ids).delete()
+    for model in (Output, Input):
+        model.all_objects.filter(inventory=inventory).delete()
+    for model in (StockCheckpoint, StockMovement, DailyMovement, StockEvent):
+        model.objects.filter(inventory=inventory).delete()
+    product = inventory.product
+    Inventory.all_objects.filter(pk=inventory.pk).delete()
+    Product.all_objects.filter(pk=product.pk).delete()
+    Category.all_objects.filter(pk=product.category_id).delete()
+    Units.all_objects.filter(pk=product.units_id).delete()
+
+
+def seed_listings(rows, tag, prefix='seed'):
+    """``rows`` filas de cada recurso listado, con relaciones y la mitad de los inventarios en modo caliente."""
+    today = timezone.localdate()
+    for i in range(rows):
+        key = f"{prefix}-{tag}{i}"
+        role = Role.objects.create(name=key)
+        user = User.objects.create(username=key, email=f"{key}@example.com", document=key, address='-', phone_number='-', role=role)
+        Coin.objects.create(name=key, symbol='$', abbreviation=key[:10])
+        product = create_product(key)
+        inventory = Inventory.objects.create(product=product, quantity=10, min_quantity=20, hot_stripes=i % 2, striped_quantity=5 * (i % 2))
+        if inventory.hot_stripes:
+            StockStripe.objects.create(inventory=inventory, slot=0, quantity=5)
+        Input.objects.create(inventory=inventory, quantity=10)
+        Output.objects.create(inventory=inventory, quantity=1)
+        bill = Bill.objects.create(user=user, total_price=3)
+        Detail.objects.bulk_create([Detail(inventory=inventory, bill=bill, quantity=1, price_unit=Decimal('1.50'), subtotal=Decimal('1.50')) for _ in range(2)])
+        DailyMovement.objects.create(inventory=inventory, day=today, input_quantity=10, output_quantity=1)
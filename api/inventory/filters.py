@@ -1,6 +1,24 @@
 import django_filters
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from django_filters.constants import EMPTY_VALUES
 from .models import *
 
+class DayFilter(django_filters.DateFilter):
+    """Día de un DateTimeField como rango [00:00, 00:00 del día siguiente).
+
+    A diferencia de lookup_expr='date', que envuelve la columna en DATE(), el
+    rango sí puede usar los índices sobre created_at / updated_at.
+    """
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        if self.distinct:
+            qs = qs.distinct()
+        start = timezone.make_aware(datetime.combine(value, time.min))
+        return self.get_method(qs)(**{f'{self.field_name}__gte': start, f'{self.field_name}__lt': start + timedelta(days=1)})
+
 class UserFilter(django_filters.FilterSet):
     username = django_filters.CharFilter(lookup_expr='icontains')
     email = django_filters.CharFilter(lookup_expr='icontains')
@@ -115,8 +133,8 @@ class ProductFilter(django_filters.FilterSet):
     price = django_filters.NumberFilter()
     units = django_filters.CharFilter(field_name='units__name', lookup_expr='icontains')
     category = django_filters.CharFilter(field_name='category__name', lookup_expr='icontains')
-    created_at = django_filters.DateFilter(field_name='created_at', lookup_expr='date')
-    updated_at = django_filters.DateFilter(field_name='updated_at', lookup_expr='date')
+    created_at = DayFilter(field_name='created_at')
+    updated_at = DayFilter(field_name='updated_at')
 
     class Meta:
         model = Product
@@ -140,14 +158,15 @@ class ProductFilter(django_filters.FilterSet):
 
 class InventoryFilter(django_filters.FilterSet):
     quantity = django_filters.NumberFilter()
-    created_at = django_filters.DateFilter(field_name='created_at', lookup_expr='date')
-    updated_at = django_filters.DateFilter(field_name='updated_at', lookup_expr='date')
+    created_at = DayFilter(field_name='created_at')
+    updated_at = DayFilter(field_name='updated_at')
 
     class Meta:
         model = Inventory
         fields = [
             'product_id',
             'quantity',
+            'below_min',
             'created_at',
             'updated_at',
             'deleted_at',
@@ -161,8 +180,8 @@ class InventoryFilter(django_filters.FilterSet):
 
 class InputFilter(django_filters.FilterSet):
     quantity = django_filters.NumberFilter()
-    created_at = django_filters.DateFilter(field_name='created_at', lookup_expr='date')
-    updated_at = django_filters.DateFilter(field_name='updated_at', lookup_expr='date')
+    created_at = DayFilter(field_name='created_at')
+    updated_at = DayFilter(field_name='updated_at')
 
     class Meta:
         model = Input
@@ -182,8 +201,8 @@ class InputFilter(django_filters.FilterSet):
 
 class OutputFilter(django_filters.FilterSet):
     quantity = django_filters.NumberFilter()
-    created_at = django_filters.DateFilter(field_name='created_at', lookup_expr='date')
-    updated_at = django_filters.DateFilter(field_name='updated_at', lookup_expr='date')
+    created_at = DayFilter(field_name='created_at')
+    updated_at = DayFilter(field_name='updated_at')
 
     class Meta:
         model = Output
@@ -203,10 +222,10 @@ class OutputFilter(django_filters.FilterSet):
 
 class BillFilter(django_filters.FilterSet):
     id = django_filters.NumberFilter()
-    date = django_filters.NumberFilter()
+    date = DayFilter(field_name='date')
     total_price = django_filters.NumberFilter()
-    created_at = django_filters.DateFilter(field_name='created_at', lookup_expr='date')
-    updated_at = django_filters.DateFilter(field_name='updated_at', lookup_expr='date')
+    created_at = DayFilter(field_name='created_at')
+    updated_at = DayFilter(field_name='updated_at')
 
     class Meta:
         model = Bill
@@ -230,8 +249,8 @@ class DetailFilter(django_filters.FilterSet):
     quantity = django_filters.NumberFilter()
     price_unit = django_filters.NumberFilter()
     subtotal = django_filters.NumberFilter()
-    created_at = django_filters.DateFilter(field_name='created_at', lookup_expr='date')
-    updated_at = django_filters.DateFilter(field_name='updated_at', lookup_expr='date')
+    created_at = DayFilter(field_name='created_at')
+    updated_at = DayFilter(field_name='updated_at')
 
     class Meta:
         model = Detail
@@ -252,3 +271,19 @@ class DetailFilter(django_filters.FilterSet):
         for field_name in self.filters:
             if 'icontains' in self.filters[field_name].lookup_expr:
                 self.filters[field_name].label = f'{self.filters[field_name].label} (similaridad)'
+
+
+class DailyMovementFilter(django_filters.FilterSet):
+    date_from = django_filters.DateFilter(field_name='day', lookup_expr='gte')
+    date_to = django_filters.DateFilter(field_name='day', lookup_expr='lte')
+    product_id = django_filters.NumberFilter(field_name='inventory__product_id')
+
+    class Meta:
+        model = DailyMovement
+        fields = [
+            'inventory_id',
+            'product_id',
+            'day',
+            'date_from',
+            'date_to',
+        ]
@@ -0,0 +1,85 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+
+# Conflictos pasajeros ("intente de nuevo"): el reintento con la misma clave debe volver a ejecutarse.
+RETRYABLE = {status.HTTP_409_CONFLICT, status.HTTP_429_TOO_MANY_REQUESTS}
+
+
+def request_fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+def replay(record, fingerprint):
+    if record.request_hash != fingerprint:
+        return Response({
+            "message": f"La clave {HEADER} ya se usó con otra petición."
+        }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    return Response(record.response, status=record.status_code, headers={'Idempotent-Replayed': 'true'})
+
+
+def stored_record(lookup, now):
+    """Respuesta ya guardada y vigente para la clave, o None."""
+    return IdempotencyKey.objects.filter(**lookup, expires_at__gt=now, status_code__isnull=False).first()
+
+
+def idempotent(method):
+    """Guarda la primera respuesta de la petición con cabecera Idempotency-Key y la repite en los reintentos.
+
+    La clave se reclama con un INSERT dentro de la misma transacción que el
+    trabajo, así un reintento concurrente espera en el índice único y después
+    recibe la respuesta guardada en vez de repetir la venta. Solo se guardan
+    los 2xx y los errores definitivos (400, 404, 422...); con un 5xx, 409 o 429
+    se deshace todo, clave incluida, y el reintento se ejecuta de nuevo.
+    """
+    @wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return method(view, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({"message": f"La cabecera {HEADER} no puede superar 255 caracteres."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        lookup = {'user': request.user, 'endpoint': request.path[:200], 'key': key}
+        fingerprint = request_fingerprint(request)
+        now = timezone.now()
+
+        record = stored_record(lookup, now)
+        if record:
+            return replay(record, fingerprint)
+
+        expires_at = now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(**lookup, request_hash=fingerprint, expires_at=expires_at)
+            except IntegrityError:
+                record = IdempotencyKey.objects.select_for_update().get(**lookup)
+                if record.expires_at > now and record.status_code is not None:
+                    return replay(record, fingerprint)
+                record.request_hash = fingerprint
+                record.expires_at = expires_at
+
+            response = method(view, request, *args, **kwargs)
+            if response.status_code >= 500 or response.status_code in RETRYABLE:
+                transaction.set_rollback(True)
+                return response
+
+            record.status_code = response.status_code
+            record.response = json.loads(JSONRenderer().render(response.data) or 'null')
+            record.save()
+        return response
+
+    return wrapper
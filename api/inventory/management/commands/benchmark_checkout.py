@@ -0,0 +1,92 @@
+import statistics
+import threading
+import time
+from django.core.management.base import CommandError
+from django.db import connection
+from inventory.factories import create_inventory, delete_inventory
+from inventory.models import Output
+from inventory.services import StockError, checkout, enqueue_checkout, process_pending_checkouts
+from inventory.management.commands.stress_checkout import Command as StressCheckoutCommand
+
+
+class Command(StressCheckoutCommand):
+    help = 'Compara la latencia que ve la caja entre la venta síncrona y la venta en cola'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--sales', type=int, default=50, help='Ventas que intenta cada hilo')
+        parser.add_argument('--quantity', type=int, default=1, help='Unidades por venta')
+        parser.add_argument('--batch', type=int, default=50, help='Ventas por transacción al vaciar la cola')
+        parser.add_argument('--allow-writes', action='store_true', help='Confirma que la base configurada es desechable')
+
+    def handle(self, *args, **options):
+        self.ensure_writes_allowed(options)
+        stock = options['threads'] * options['sales'] * options['quantity']
+        for mode, sell in (('síncrona', checkout), ('en cola', enqueue_checkout)):
+            inventory = create_inventory('benchmark-checkout', stock)
+            try:
+                latencies, elapsed = self.run(inventory, sell, options)
+                self.report(mode, latencies, elapsed)
+                if sell is enqueue_checkout:
+                    self.drain(inventory, options)
+            finally:
+                delete_inventory(inventory)
+
+    def run(self, inventory, sell, options):
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        line = [{'product_id': inventory.product_id, 'quantity': options['quantity']}]
+
+        def worker():
+            try:
+                for _ in range(options['sales']):
+                    started = time.perf_counter()
+                    try:
+                        sell(None, line)
+                    except StockError as e:
+                        with lock:
+                            errors.append(e.detail['message'])
+                        continue
+                    with lock:
+                        latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise CommandError(f"Errores durante la prueba: {errors[:5]}")
+        return latencies, time.perf_counter() - started
+
+    def report(self, mode, latencies, elapsed):
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f"Venta {mode}: {len(latencies)} ventas en {elapsed:.2f}s, "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms, "
+            f"máx {latencies[-1] * 1000:.1f} ms"
+        )
+
+    def drain(self, inventory, options):
+        started = time.perf_counter()
+        while process_pending_checkouts(options['batch']) == options['batch']:
+            pass
+        elapsed = time.perf_counter() - started
+
+        inventory.refresh_from_db()
+        sold = options['threads'] * options['sales'] * options['quantity']
+        if inventory.quantity != 0 or inventory.reserved_quantity != 0:
+            raise CommandError(f"La cola dejó cantidad {inventory.quantity} y reservado {inventory.reserved_quantity}.")
+        if Output.objects.filter(inventory=inventory).count() != options['threads'] * options['sales']:
+            raise CommandError("El número de salidas no coincide con las ventas en cola.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Cola vaciada en {elapsed:.2f}s ({sold / options['quantity'] / elapsed:.1f} ventas/s), sin diferencias."
+        ))
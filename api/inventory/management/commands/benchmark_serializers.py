@@ -0,0 +1,83 @@
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from inventory.api import InventoryIndexAPIView, ProductIndexAPIView
+from inventory.models import *
+from inventory.rows import compile_row_plan
+
+VIEWS = [ProductIndexAPIView, InventoryIndexAPIView]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compara el serializador de DRF con la ruta por columnas (.values_list()) en los listados de productos e inventarios'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help='Productos e inventarios de prueba')
+        parser.add_argument('--repeat', type=int, default=5, help='Repeticiones por ruta; se informa la mejor')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options['rows'])
+                results = [self.compare(view_class, options['repeat']) for view_class in VIEWS]
+                raise Rollback()
+        except Rollback:
+            pass
+
+        for name, rows, serializer_time, rows_time in results:
+            self.stdout.write(
+                f"{name:<12} {rows:>6} filas  serializador {serializer_time * 1000:8.1f} ms  "
+                f"columnas {rows_time * 1000:8.1f} ms  ({serializer_time / rows_time:.1f}x)"
+            )
+        self.stdout.write(self.style.SUCCESS("Ambas rutas producen el mismo JSON."))
+
+    def seed(self, rows):
+        category = Category.objects.create(name='benchmark-serializers', description='-')
+        units = Units.objects.create(name='benchmark-serializers', abbreviation='bs')
+        products = Product.objects.bulk_create([
+            Product(name=f'benchmark-serializers-{i}', description='-', price=Decimal('1.25') + i, category=category, units=units, img='benchmark.png')
+            for i in range(rows)
+        ])
+        Inventory.objects.bulk_create([
+            Inventory(product=product, quantity=50, reserved_quantity=i % 3, total_price=product.price * 50, min_quantity=10, hot_stripes=i % 2, striped_quantity=5 * (i % 2))
+            for i, product in enumerate(products)
+        ])
+        StockStripe.objects.bulk_create([
+            StockStripe(inventory=inventory, slot=0, quantity=5)
+            for inventory in Inventory.objects.filter(product__in=products, hot_stripes__gt=0)
+        ])
+
+    def compare(self, view_class, repeat):
+        view = view_class()
+        view.request = Request(APIRequestFactory().get('/'))
+        plan = compile_row_plan(view_class)
+        if plan is None:
+            raise CommandError(f"{view_class.__name__} no se puede leer por columnas.")
+
+        renderer = JSONRenderer()
+        serializer_time, expected = self.measure(view, None, repeat)
+        rows_time, data = self.measure(view, plan, repeat)
+        if renderer.render(data) != renderer.render(expected):
+            raise CommandError(f"{view_class.__name__}: la ruta por columnas no produce el mismo JSON que el serializador.")
+        return view_class.envelope, len(data), serializer_time, rows_time
+
+    def measure(self, view, plan, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            view.row_plan = plan
+            queryset = view.get_queryset().order_by('pk')
+            if plan:
+                queryset = plan.values(queryset)
+            data = view.serialize_chunk(list(queryset))
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, data
@@ -0,0 +1,127 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from inventory.factories import create_admin, seed_listings
+from inventory.models import *
+
+# Consultas máximas por endpoint con sesión ya resuelta: permiso, validadores
+# del listado (COUNT y MAX(updated_at)), consulta principal y un prefetch por
+# relación múltiple. No deben crecer con las filas.
+BUDGETS = [
+    ('user-list', '', 3),
+    ('user-show', '', 2),
+    ('role-list', '', 3),
+    ('role-show', '', 2),
+    ('category-index', '', 3),
+    ('category-show', '', 2),
+    ('unit-index', '', 3),
+    ('unit-show', '', 2),
+    ('coin-index', '', 3),
+    ('coin-show', '', 2),
+    ('product-index', '', 3),
+    ('product-show', '', 2),
+    ('inventory-index', '', 3),
+    ('inventory-low-stock', '', 3),
+    ('inventory-show', '', 3),
+    ('input-index', '', 4),
+    ('input-show', '', 3),
+    ('output-index', '', 4),
+    ('output-show', '', 3),
+    ('bill-index', '', 5),
+    ('bill-index', '?view=flat', 6),
+    ('bill-index', '?fields=id,total_price', 3),
+    ('bill-index', '?fields=id,details.quantity', 4),
+    ('bill-index', '?view=flat&fields=id,user_id', 4),
+    ('bill-index', '?view=flat&fields=id,details.quantity', 4),
+    ('bill-show', '', 2),
+    ('detail-index', '', 4),
+    ('detail-show', '', 3),
+    ('daily-movement-index', '', 2),
+]
+
+UNCACHED = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+SAMPLES = {
+    'user-show': User,
+    'role-show': Role,
+    'category-show': Category,
+    'unit-show': Units,
+    'coin-show': Coin,
+    'product-show': Product,
+    'input-show': Input,
+    'output-show': Output,
+    'bill-show': Bill,
+    'detail-show': Detail,
+}
+
+
+def endpoint_url(name):
+    """URL del endpoint; los detalles apuntan a la última fila sembrada (el inventario, a uno caliente)."""
+    if name == 'inventory-show':
+        return reverse(name, kwargs={'pk': Inventory.objects.filter(hot_stripes__gt=0).last().pk})
+    if name in SAMPLES:
+        return reverse(name, kwargs={'pk': SAMPLES[name].objects.last().pk})
+    return reverse(name)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Verifica que los listados y detalles hagan un número fijo de consultas, sin importar cuántas filas devuelvan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5, help='Filas de prueba por recurso en la primera pasada (la segunda usa el doble)')
+
+    def handle(self, *args, **options):
+        # Se mide la consulta real: la caché de datos de referencia la ocultaría.
+        try:
+            with override_settings(CACHES=UNCACHED), transaction.atomic():
+                failures = self.measure_budgets(options['rows'])
+                raise Rollback()
+        except Rollback:
+            pass
+
+        if failures:
+            raise CommandError("\n".join(failures))
+        self.stdout.write(self.style.SUCCESS(f"{len(BUDGETS)} endpoints dentro de su presupuesto de consultas."))
+
+    def measure_budgets(self, rows):
+        client = APIClient(HTTP_HOST=self.host())
+        client.force_authenticate(create_admin('check-query-counts'))
+
+        seed_listings(rows, 'a', 'check')
+        first = self.measure(client)
+        seed_listings(rows, 'b', 'check')
+        second = self.measure(client)
+
+        failures = []
+        for name, query, budget in BUDGETS:
+            label = name + query
+            status_code, count = second[label]
+            self.stdout.write(f"{label:<30} {first[label][1]:>3} -> {count:>3} consultas (máx. {budget})")
+            if status_code != 200:
+                failures.append(f"{label}: respondió {status_code}")
+            elif count != first[label][1]:
+                failures.append(f"{label}: pasó de {first[label][1]} a {count} consultas al duplicar las filas")
+            elif count > budget:
+                failures.append(f"{label}: {count} consultas, el máximo es {budget}")
+        return failures
+
+    def host(self):
+        return next((host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')), 'localhost')
+
+    def measure(self, client):
+        counts = {}
+        for name, query, _ in BUDGETS:
+            url = endpoint_url(name) + query
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            counts[name + query] = (response.status_code, len(queries.captured_queries))
+        return counts
@@ -0,0 +1,86 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from inventory.models import Inventory, StockEvent
+from inventory.sinks import event_payload, get_sinks
+
+
+class Command(BaseCommand):
+    help = 'Envía los eventos de stock pendientes a los destinos configurados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=100, help='Eventos por lote')
+        parser.add_argument('--sink', action='append', dest='sinks', help="Destino ('log', 'http' o ruta a una clase). Se puede repetir.")
+        parser.add_argument('--loop', action='store_true', help='Seguir esperando eventos nuevos')
+        parser.add_argument('--interval', type=float, default=5, help='Segundos de espera entre lotes vacíos con --loop')
+        parser.add_argument('--max-attempts', type=int, default=5, help='Intentos antes de dejar un evento sin enviar')
+        parser.add_argument('--retry-delay', type=float, default=30, help='Segundos antes del primer reintento; se duplica en cada fallo')
+
+    def handle(self, *args, **options):
+        sinks = get_sinks(options['sinks'])
+        sent = failed = 0
+        while True:
+            batch_sent, batch_failed = self.dispatch_batch(sinks, options['batch'], options['max_attempts'], options['retry_delay'])
+            sent += batch_sent
+            failed += batch_failed
+            if batch_sent + batch_failed < options['batch']:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f"{sent} eventos de stock enviados, {failed} envíos fallidos."))
+
+    @transaction.atomic
+    def dispatch_batch(self, sinks, size, max_attempts, retry_delay):
+        """Envía un lote y devuelve (enviados, fallidos).
+
+        Si el lote falla se reintenta evento por evento: uno que el destino
+        rechaza no frena a los siguientes. Cada fallo pospone el evento el
+        doble que el anterior; tras ``max_attempts`` queda sin enviar, con su
+        último error, hasta que se despache con un máximo mayor.
+        """
+        now = timezone.now()
+        # skip_locked permite varios despachadores en paralelo sin repetir eventos.
+        events = list(StockEvent.objects
+                      .select_for_update(skip_locked=True)
+                      .filter(dispatched_at__isnull=True, attempts__lt=max_attempts)
+                      .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+                      .order_by('id')[:size])
+        if not events:
+            return 0, 0
+
+        product_ids = dict(Inventory.all_objects
+                           .filter(pk__in={event.inventory_id for event in events})
+                           .values_list('id', 'product_id'))
+        payloads = {event.pk: event_payload(event, product_ids.get(event.inventory_id)) for event in events}
+
+        errors = {}
+        try:
+            self.send(sinks, list(payloads.values()))
+        except Exception as e:
+            self.stderr.write(f"No se pudo enviar el lote, se reintenta evento por evento: {e}")
+            for event in events:
+                try:
+                    self.send(sinks, [payloads[event.pk]])
+                except Exception as e:
+                    errors[event.pk] = str(e)
+
+        for event in events:
+            event.attempts += 1
+            if event.pk in errors:
+                event.last_error = errors[event.pk]
+                event.next_attempt_at = now + timedelta(seconds=retry_delay * 2 ** (event.attempts - 1))
+                if event.attempts >= max_attempts:
+                    self.stderr.write(f"Evento #{event.pk} sin enviar tras {event.attempts} intentos: {event.last_error}")
+            else:
+                event.dispatched_at = now
+                event.last_error = None
+                event.next_attempt_at = None
+        StockEvent.objects.bulk_update(events, ['dispatched_at', 'attempts', 'last_error', 'next_attempt_at'])
+        return len(events) - len(errors), len(errors)
+
+    def send(self, sinks, payload):
+        for sink in sinks:
+            sink.send(payload)
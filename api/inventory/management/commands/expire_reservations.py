@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from inventory.services import expire_reservations
+
+
+class Command(BaseCommand):
+    help = 'Vence las reservas cuyo plazo terminó y devuelve su stock al disponible, por lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=500, help='Reservas por transacción')
+        parser.add_argument('--loop', action='store_true', help='Seguir revisando indefinidamente')
+        parser.add_argument('--interval', type=float, default=30, help='Segundos entre pasadas con --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            expired = 0
+            while True:
+                count = expire_reservations(options['batch'])
+                expired += count
+                if count < options['batch']:
+                    break
+            self.stdout.write(f"{expired} reservas vencidas.")
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,141 @@
+import json
+import re
+from datetime import date, datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+import django_filters
+from inventory.api import *
+
+VIEWS = [
+    UserIndexAPIView,
+    RoleIndexAPIView,
+    CategoryIndexAPIView,
+    UnitIndexAPIView,
+    CoinIndexAPIView,
+    ProductIndexAPIView,
+    InventoryIndexAPIView,
+    InputIndexAPIView,
+    OutputIndexAPIView,
+    BillIndexAPIView,
+    DetailIndexAPIView,
+    DailyMovementIndexAPIView,
+]
+
+# Recorrido completo de la tabla o de un índice entero, según el motor.
+MYSQL_SCANS = {'ALL', 'index'}
+SQLITE_SCAN = re.compile(r'\bSCAN (\w+)')
+POSTGRESQL_SCAN = re.compile(r'Seq Scan on (\w+)')
+# Sobre filas vivas, un índice usado solo por deleted_at también las recorre todas.
+SQLITE_LIVE_SCAN = re.compile(r'\bSEARCH (\w+) USING (?:COVERING )?INDEX \w+ \(deleted_at=\?\)$', re.MULTILINE)
+# Un listado paginado por orden solo debe leer la página: basta con que no ordene en memoria.
+SQLITE_SORT = re.compile(r'USE TEMP B-TREE FOR ORDER BY')
+POSTGRESQL_SORT = re.compile(r'\bSort\b')
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta EXPLAIN sobre las consultas típicas de cada FilterSet y del orden por defecto de los listados, '
+        'y marca los planes que recorren tablas completas. El plan depende de las estadísticas: correr contra datos reales'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--strict', action='store_true', help='Termina con error si algún plan recorre una tabla completa')
+
+    def handle(self, *args, **options):
+        flagged = 0
+        for view_class in VIEWS:
+            for label, queryset, ordered, live in self.queries(view_class):
+                plan, problem = self.sorts(queryset) if ordered else self.scans(queryset, live)
+                if problem:
+                    flagged += 1
+                    self.stdout.write(self.style.WARNING(f"{view_class.envelope:<16} {label:<40} {problem}"))
+                    if options['verbosity'] > 1:
+                        self.stdout.write(plan)
+                elif options['verbosity'] > 1:
+                    self.stdout.write(f"{view_class.envelope:<16} {label:<40} ok")
+
+        if flagged and options['strict']:
+            raise CommandError(f"{flagged} consultas recorren tablas completas u ordenan en memoria.")
+        if flagged:
+            self.stdout.write(self.style.WARNING(f"{flagged} consultas recorren tablas completas u ordenan en memoria."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Todas las consultas usan índices."))
+
+    def queries(self, view_class):
+        """Un filtro por consulta sobre las filas vivas, más el orden que usa la paginación del listado."""
+        model = view_class.model
+        for name, filter in view_class.filterset_class.base_filters.items():
+            # LIKE '%...%' no puede usar un índice B-tree: no tiene sentido marcarlo.
+            if 'icontains' in filter.lookup_expr:
+                continue
+            value = self.sample(model, filter)
+            if value is None:
+                continue
+            # deleted_at solo tiene sentido con ?scope=deleted.
+            live = filter.field_name != 'deleted_at'
+            manager = model.objects if live else model.deleted_objects
+            filterset = view_class.filterset_class({name: value}, queryset=manager.all())
+            if not filterset.is_valid():
+                raise CommandError(f"{view_class.__name__}: ?{name}={value} no es válido: {filterset.errors.as_text()}")
+            yield f'?{name}={value}', filterset.qs, False, live
+
+        if view_class.keyset_pagination:
+            ordering = KeysetPagination.ordering
+            yield f"cursor ({', '.join(ordering)})", model.objects.order_by(*ordering)[:api_settings.PAGE_SIZE], True, True
+        if view_class is InventoryIndexAPIView:
+            yield 'low-stock (id)', model.objects.filter(below_min=True).order_by(LowStockPagination.ordering)[:api_settings.PAGE_SIZE], True, True
+
+    def sample(self, model, filter):
+        """Valor real de la columna si hay filas; si no, uno de ejemplo del tipo del filtro."""
+        value = model._base_manager.exclude(**{f'{filter.field_name}__isnull': True}).values_list(filter.field_name, flat=True).first()
+        if isinstance(filter, django_filters.DateFilter):
+            if isinstance(value, datetime):
+                value = timezone.localtime(value).date()
+            return (value or date.today()).isoformat()
+        if isinstance(filter, (django_filters.DateTimeFilter, django_filters.IsoDateTimeFilter)):
+            return (value or timezone.now()).isoformat()
+        if isinstance(filter, django_filters.BooleanFilter):
+            return 'true' if value is None or value else 'false'
+        if isinstance(filter, django_filters.NumberFilter):
+            return str(1 if value is None else value)
+        if isinstance(filter, django_filters.ModelChoiceFilter):
+            return None if value is None else str(value)
+        return None
+
+    def explain(self, queryset):
+        if connection.vendor not in ('mysql', 'sqlite', 'postgresql'):
+            raise CommandError(f"EXPLAIN no está soportado para {connection.vendor}.")
+        return queryset.explain(format='json') if connection.vendor == 'mysql' else queryset.explain()
+
+    def scans(self, queryset, live):
+        """Plan de la consulta y, si las hay, las tablas que recorre completas."""
+        plan = self.explain(queryset)
+        if connection.vendor == 'mysql':
+            tables = set(self.mysql_scans(json.loads(plan), live))
+        elif connection.vendor == 'sqlite':
+            tables = set(SQLITE_SCAN.findall(plan)) | set(SQLITE_LIVE_SCAN.findall(plan) if live else ())
+        else:
+            tables = set(POSTGRESQL_SCAN.findall(plan))
+        return plan, f"recorre {', '.join(sorted(tables))}" if tables else None
+
+    def sorts(self, queryset):
+        """Plan de la consulta y, si lo hay, el aviso de que ordena en memoria en vez de leer un índice."""
+        plan = self.explain(queryset)
+        if connection.vendor == 'mysql':
+            sorts = '"using_filesort": true' in plan
+        elif connection.vendor == 'sqlite':
+            sorts = bool(SQLITE_SORT.search(plan))
+        else:
+            sorts = bool(POSTGRESQL_SORT.search(plan))
+        return plan, 'ordena en memoria' if sorts else None
+
+    def mysql_scans(self, node, live):
+        if isinstance(node, dict):
+            if node.get('access_type') in MYSQL_SCANS or (live and node.get('used_key_parts') == ['deleted_at']):
+                yield node.get('table_name')
+            for value in node.values():
+                yield from self.mysql_scans(value, live)
+        elif isinstance(node, list):
+            for value in node:
+                yield from self.mysql_scans(value, live)
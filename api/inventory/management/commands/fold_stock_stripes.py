@@ -0,0 +1,19 @@
+import time
+from django.core.management.base import BaseCommand
+from inventory.services import fold_stripes
+
+
+class Command(BaseCommand):
+    help = 'Pliega en Inventory.quantity lo vendido desde los sub-contadores de los SKU calientes y los vuelve a repartir'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Seguir plegando indefinidamente')
+        parser.add_argument('--interval', type=float, default=5, help='Segundos entre pasadas con --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            folded = fold_stripes()
+            self.stdout.write(f"{folded} unidades plegadas.")
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
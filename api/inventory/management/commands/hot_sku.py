@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from inventory.services import StockError, set_hot_stripes
+
+
+class Command(BaseCommand):
+    help = 'Activa (o desactiva con --stripes 0) el modo SKU caliente de un producto, repartiendo su stock en sub-contadores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('product_id', type=int)
+        parser.add_argument('--stripes', type=int, default=8, help='Número de sub-contadores; 0 vuelve al modo normal')
+
+    def handle(self, *args, **options):
+        try:
+            inventory = set_hot_stripes(options['product_id'], options['stripes'])
+        except StockError as e:
+            raise CommandError(e.detail['message'])
+
+        if inventory.hot_stripes:
+            self.stdout.write(self.style.SUCCESS(
+                f"Producto {options['product_id']}: {inventory.striped_quantity} unidades repartidas en "
+                f"{inventory.hot_stripes} sub-contadores."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Producto {options['product_id']}: modo normal, cantidad {inventory.quantity}."))
@@ -0,0 +1,43 @@
+import threading
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from inventory.services import process_pending_checkouts
+
+
+class Command(BaseCommand):
+    help = 'Escribe las ventas en cola (salidas, facturas y detalles) por lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=50, help='Ventas por transacción')
+        parser.add_argument('--workers', type=int, default=1, help='Hilos que vacían la cola en paralelo')
+        parser.add_argument('--max-attempts', type=int, default=5, help='Intentos antes de dar una venta por fallida')
+        parser.add_argument('--loop', action='store_true', help='Seguir esperando ventas indefinidamente')
+        parser.add_argument('--interval', type=float, default=1, help='Segundos de espera con la cola vacía')
+
+    def handle(self, *args, **options):
+        processed = []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                while True:
+                    count = process_pending_checkouts(options['batch'], options['max_attempts'])
+                    with lock:
+                        processed.append(count)
+                    if count < options['batch']:
+                        if not options['loop']:
+                            return
+                        time.sleep(options['interval'])
+            finally:
+                connection.close()
+
+        if options['workers'] == 1:
+            worker()
+        else:
+            threads = [threading.Thread(target=worker) for _ in range(options['workers'])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.stdout.write(self.style.SUCCESS(f"{sum(processed)} ventas procesadas."))
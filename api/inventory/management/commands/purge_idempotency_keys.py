@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from inventory.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Borra las claves de idempotencia vencidas, por lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=1000, help='Claves por sentencia')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        purged = 0
+        while True:
+            ids = list(IdempotencyKey.objects
+                       .filter(expires_at__lte=now)
+                       .order_by('expires_at')
+                       .values_list('id', flat=True)[:options['batch']])
+            if not ids:
+                break
+            purged += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"{purged} claves de idempotencia borradas."))
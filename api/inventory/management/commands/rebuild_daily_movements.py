@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from inventory.models import DailyMovement, Input, Inventory, Output
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el resumen diario de entradas y salidas a partir de las tablas Input y Output'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk', type=int, default=200, help='Inventarios por transacción')
+
+    def handle(self, *args, **options):
+        inventory_ids = list(Inventory.all_objects.order_by('pk').values_list('pk', flat=True))
+        rows = 0
+        for i in range(0, len(inventory_ids), options['chunk']):
+            rows += self.rebuild(inventory_ids[i:i + options['chunk']])
+        self.stdout.write(self.style.SUCCESS(f"{rows} filas de resumen diario reconstruidas para {len(inventory_ids)} inventarios."))
+
+    @transaction.atomic
+    def rebuild(self, inventory_ids):
+        # Bloquear los inventarios detiene las ventas y entradas de este bloque
+        # mientras se recalcula, así ningún incremento en vuelo se pierde.
+        list(Inventory.all_objects.select_for_update().filter(pk__in=inventory_ids).order_by('product_id').values_list('pk', flat=True))
+
+        totals = {}
+        for model, position in ((Input, 0), (Output, 1)):
+            rows = (model.all_objects
+                    .filter(inventory_id__in=inventory_ids)
+                    .annotate(day=TruncDate('created_at'))
+                    .values('inventory_id', 'day')
+                    .annotate(total=Sum('quantity'))
+                    .values_list('inventory_id', 'day', 'total'))
+            for inventory_id, day, total in rows:
+                totals.setdefault((inventory_id, day), [0, 0])[position] = total
+
+        DailyMovement.objects.filter(inventory_id__in=inventory_ids).delete()
+        DailyMovement.objects.bulk_create([
+            DailyMovement(inventory_id=inventory_id, day=day, input_quantity=input_quantity, output_quantity=output_quantity)
+            for (inventory_id, day), (input_quantity, output_quantity) in totals.items()
+        ], batch_size=1000)
+        return len(totals)
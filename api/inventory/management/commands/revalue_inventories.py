@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+from inventory.models import Inventory
+from inventory.services import revalue_inventories
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el valor total de todo el inventario con los precios vigentes, por bloques de ids'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk', type=int, default=1000, help='Rango de ids por sentencia')
+
+    def handle(self, *args, **options):
+        bounds = Inventory.all_objects.aggregate(first=Min('id'), last=Max('id'))
+        if bounds['first'] is None:
+            self.stdout.write("No hay inventarios que revalorizar.")
+            return
+
+        changed = 0
+        for start in range(bounds['first'], bounds['last'] + 1, options['chunk']):
+            changed += revalue_inventories(Inventory.all_objects.filter(id__gte=start, id__lt=start + options['chunk']))
+        self.stdout.write(self.style.SUCCESS(f"{changed} inventarios revalorizados."))
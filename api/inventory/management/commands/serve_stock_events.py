@@ -0,0 +1,31 @@
+import json
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Servidor HTTP local que recibe y muestra los eventos de stock, para probar el destino http'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8001)
+
+    def handle(self, *args, **options):
+        stdout = self.stdout
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                for event in json.loads(body or b'{}').get('events', []):
+                    stdout.write(json.dumps(event, ensure_ascii=False))
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        server = HTTPServer(('127.0.0.1', options['port']), Handler)
+        self.stdout.write(f"Escuchando eventos de stock en http://127.0.0.1:{options['port']}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
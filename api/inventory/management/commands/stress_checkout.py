@@ -0,0 +1,83 @@
+import threading
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from inventory.factories import create_inventory, delete_inventory
+from inventory.models import *
+from inventory.services import StockError, checkout
+
+
+class Command(BaseCommand):
+    help = 'Lanza ventas concurrentes sobre un mismo producto y verifica que no se venda más stock del existente'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--sales', type=int, default=50, help='Ventas que intenta cada hilo')
+        parser.add_argument('--stock', type=int, default=100)
+        parser.add_argument('--quantity', type=int, default=1, help='Unidades por venta')
+        parser.add_argument('--keep', action='store_true', help='No borrar los datos de prueba al terminar')
+        parser.add_argument('--allow-writes', action='store_true', help='Confirma que la base configurada es desechable')
+
+    def handle(self, *args, **options):
+        self.ensure_writes_allowed(options)
+        inventory = create_inventory('stress-checkout', options['stock'])
+        results = {'ok': 0, 'rejected': 0, 'errors': []}
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                for _ in range(options['sales']):
+                    try:
+                        checkout(None, [{'product_id': inventory.product_id, 'quantity': options['quantity']}])
+                        outcome = 'ok'
+                    except StockError:
+                        outcome = 'rejected'
+                    with lock:
+                        results[outcome] += 1
+            except Exception as e:
+                with lock:
+                    results['errors'].append(str(e))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        try:
+            self.verify(inventory, options, results)
+            self.stdout.write(self.style.SUCCESS(
+                f"{results['ok']} ventas confirmadas, {results['rejected']} rechazadas por falta de stock "
+                f"en {elapsed:.2f}s ({(results['ok'] + results['rejected']) / elapsed:.1f} ventas/s). Sin sobreventa."
+            ))
+        finally:
+            if not options['keep']:
+                delete_inventory(inventory)
+
+    def ensure_writes_allowed(self, options):
+        """Crea y borra ventas reales: solo corre si se confirma con --allow-writes."""
+        if not options['allow_writes']:
+            raise CommandError(
+                f"Esta prueba escribe y borra ventas en la base '{connection.settings_dict['NAME']}'. "
+                "Córrala contra una base desechable con --allow-writes; la verificación automática está en manage.py test inventory."
+            )
+
+    def verify(self, inventory, options, results):
+        if results['errors']:
+            raise CommandError(f"Errores durante la prueba: {results['errors'][:5]}")
+
+        inventory.refresh_from_db()
+        sold = Output.objects.filter(inventory=inventory).aggregate(total=Sum('quantity'))['total'] or 0
+        expected_sold = results['ok'] * options['quantity']
+
+        if sold != expected_sold or sold > options['stock']:
+            raise CommandError(f"Sobreventa: se registraron {sold} unidades vendidas para un stock de {options['stock']}.")
+        if inventory.quantity != options['stock'] - sold:
+            raise CommandError(f"Cantidad final {inventory.quantity}, se esperaba {options['stock'] - sold}.")
+        if Detail.objects.filter(inventory=inventory).count() != results['ok']:
+            raise CommandError("El número de detalles no coincide con las ventas confirmadas.")
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.3 on 2026-10-18 11:24
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def merge_duplicate_inventories(apps, schema_editor):
+    Inventory = apps.get_model('inventory', 'Inventory')
+    duplicated = (Inventory.objects.values('product_id')
+                  .annotate(rows=Count('id'))
+                  .filter(rows__gt=1, product_id__isnull=False))
+
+    for row in duplicated:
+        inventories = Inventory.objects.filter(product_id=row['product_id']).order_by('id')
+        keeper = inventories.first()
+        others = inventories.exclude(pk=keeper.pk)
+        totals = inventories.aggregate(quantity=Sum('quantity'), total_price=Sum('total_price'))
+
+        for model_name in ('Input', 'Output', 'Detail'):
+            apps.get_model('inventory', model_name).objects.filter(inventory__in=others).update(inventory=keeper)
+
+        others.delete()
+        keeper.quantity = totals['quantity']
+        keeper.total_price = totals['total_price']
+        keeper.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_remove_bill_detail_detail_bill_alter_bill_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_inventories, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='inventory',
+            constraint=models.UniqueConstraint(fields=('product',), name='unique_inventory_product'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.3 on 2026-10-18 11:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0016_stockmovement_stockcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Día')),
+                ('input_quantity', models.PositiveIntegerField(default=0)),
+                ('output_quantity', models.PositiveIntegerField(default=0)),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='daily_movements', to='inventory.inventory')),
+            ],
+            options={
+                'verbose_name': 'Movimiento diario',
+                'verbose_name_plural': 'Movimientos diarios',
+                'indexes': [models.Index(fields=['day'], name='daily_movement_day')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailymovement',
+            constraint=models.UniqueConstraint(fields=('inventory', 'day'), name='unique_daily_movement'),
+        ),
+    ]
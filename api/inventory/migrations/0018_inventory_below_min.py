@@ -0,0 +1,29 @@
+# Generated by Django 5.0.3 on 2026-10-18 11:27
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def flag_below_min(apps, schema_editor):
+    Inventory = apps.get_model('inventory', 'Inventory')
+    Inventory.objects.filter(quantity__lt=F('min_quantity')).update(below_min=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0017_dailymovement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventory',
+            name='below_min',
+            field=models.BooleanField(default=False, verbose_name='Por debajo del mínimo'),
+        ),
+        migrations.RunPython(flag_below_min, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['below_min', 'id'], name='inventory_below_min'),
+        ),
+    ]
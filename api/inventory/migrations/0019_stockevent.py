@@ -0,0 +1,34 @@
+# Generated by Django 5.0.3 on 2026-10-18 11:28
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0018_inventory_below_min'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('low_stock', 'Por debajo del mínimo'), ('restocked', 'Repuesto'), ('zeroed', 'Agotado')], max_length=20)),
+                ('quantity', models.PositiveIntegerField()),
+                ('min_quantity', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de creación')),
+                ('dispatched_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de envío')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='events', to='inventory.inventory')),
+            ],
+            options={
+                'verbose_name': 'Evento de stock',
+                'verbose_name_plural': 'Eventos de stock',
+                'indexes': [models.Index(fields=['dispatched_at', 'id'], name='stock_event_pending')],
+            },
+        ),
+    ]
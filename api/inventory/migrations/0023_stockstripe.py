@@ -0,0 +1,42 @@
+# Generated by Django 5.0.3 on 2026-10-18 11:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0022_pendingcheckout'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventory',
+            name='hot_stripes',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Sub-contadores (SKU caliente)'),
+        ),
+        migrations.AddField(
+            model_name='inventory',
+            name='striped_quantity',
+            field=models.PositiveIntegerField(default=0, verbose_name='Cantidad repartida en sub-contadores'),
+        ),
+        migrations.CreateModel(
+            name='StockStripe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('sold', models.PositiveIntegerField(default=0)),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stripes', to='inventory.inventory')),
+            ],
+            options={
+                'verbose_name': 'Sub-contador de stock',
+                'verbose_name_plural': 'Sub-contadores de stock',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stockstripe',
+            constraint=models.UniqueConstraint(fields=('inventory', 'slot'), name='unique_stock_stripe'),
+        ),
+    ]
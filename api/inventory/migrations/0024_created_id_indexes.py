@@ -0,0 +1,29 @@
+# Generated by Django 5.0.3 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0023_stockstripe'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['created_at', 'id'], name='bill_created_id'),
+        ),
+        migrations.AddIndex(
+            model_name='detail',
+            index=models.Index(fields=['created_at', 'id'], name='detail_created_id'),
+        ),
+        migrations.AddIndex(
+            model_name='input',
+            index=models.Index(fields=['created_at', 'id'], name='input_created_id'),
+        ),
+        migrations.AddIndex(
+            model_name='output',
+            index=models.Index(fields=['created_at', 'id'], name='output_created_id'),
+        ),
+    ]
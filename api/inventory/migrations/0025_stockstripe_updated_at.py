@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-18 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0024_created_id_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockstripe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.0.3 on 2026-10-18 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('inventory', '0025_stockstripe_updated_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='bill',
+            name='bill_created_id',
+        ),
+        migrations.RemoveIndex(
+            model_name='detail',
+            name='detail_created_id',
+        ),
+        migrations.RemoveIndex(
+            model_name='input',
+            name='input_created_id',
+        ),
+        migrations.RemoveIndex(
+            model_name='inventory',
+            name='inventory_below_min',
+        ),
+        migrations.RemoveIndex(
+            model_name='output',
+            name='output_created_id',
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['deleted_at', 'created_at', 'id'], name='bill_live_created_id'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['deleted_at'], name='bill_deleted_at'),
+        ),
+        migrations.AddIndex(
+            model_name='detail',
+            index=models.Index(fields=['deleted_at', 'created_at', 'id'], name='detail_live_created_id'),
+        ),
+        migrations.AddIndex(
+            model_name='detail',
+            index=models.Index(fields=['deleted_at'], name='detail_deleted_at'),
+        ),
+        migrations.AddIndex(
+            model_name='input',
+            index=models.Index(fields=['deleted_at', 'created_at', 'id'], name='input_live_created_id'),
+        ),
+        migrations.AddIndex(
+            model_name='input',
+            index=models.Index(fields=['deleted_at'], name='input_deleted_at'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['below_min', 'deleted_at', 'id'], name='inventory_live_below_min'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['deleted_at'], name='inventory_deleted_at'),
+        ),
+        migrations.AddIndex(
+            model_name='output',
+            index=models.Index(fields=['deleted_at', 'created_at', 'id'], name='output_live_created_id'),
+        ),
+        migrations.AddIndex(
+            model_name='output',
+            index=models.Index(fields=['deleted_at'], name='output_deleted_at'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['deleted_at'], name='product_deleted_at'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['deleted_at'], name='user_deleted_at'),
+        ),
+    ]
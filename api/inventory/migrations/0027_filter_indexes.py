@@ -0,0 +1,89 @@
+# Generated by Django 5.0.3 on 2026-10-18 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0026_soft_delete_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['user', 'deleted_at', 'created_at', 'id'], name='bill_user_live'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['deleted_at', 'updated_at'], name='bill_live_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['deleted_at', 'date'], name='bill_live_date'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['deleted_at', 'total_price'], name='bill_live_total_price'),
+        ),
+        migrations.AddIndex(
+            model_name='detail',
+            index=models.Index(fields=['inventory', 'deleted_at', 'created_at', 'id'], name='detail_inventory_live'),
+        ),
+        migrations.AddIndex(
+            model_name='detail',
+            index=models.Index(fields=['bill', 'deleted_at', 'id'], name='detail_bill_live'),
+        ),
+        migrations.AddIndex(
+            model_name='detail',
+            index=models.Index(fields=['deleted_at', 'updated_at'], name='detail_live_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='input',
+            index=models.Index(fields=['inventory', 'deleted_at', 'created_at', 'id'], name='input_inventory_live'),
+        ),
+        migrations.AddIndex(
+            model_name='input',
+            index=models.Index(fields=['deleted_at', 'updated_at'], name='input_live_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='input',
+            index=models.Index(fields=['deleted_at', 'quantity'], name='input_live_quantity'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['deleted_at', 'quantity'], name='inventory_live_quantity'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['deleted_at', 'created_at'], name='inventory_live_created'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['deleted_at', 'updated_at'], name='inventory_live_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='output',
+            index=models.Index(fields=['inventory', 'deleted_at', 'created_at', 'id'], name='output_inventory_live'),
+        ),
+        migrations.AddIndex(
+            model_name='output',
+            index=models.Index(fields=['deleted_at', 'updated_at'], name='output_live_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='output',
+            index=models.Index(fields=['deleted_at', 'quantity'], name='output_live_quantity'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['deleted_at', 'price'], name='product_live_price'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['deleted_at', 'created_at'], name='product_live_created'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['deleted_at', 'updated_at'], name='product_live_updated'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-18 12:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0027_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockevent',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Próximo intento'),
+        ),
+    ]
@@ -2,6 +2,28 @@ from django.db import models
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser, PermissionsMixin, Permission
 from django.utils import timezone
 
+class SoftDeleteQuerySet(models.QuerySet):
+    def live(self):
+        return self.filter(deleted_at__isnull=True)
+
+    def deleted(self):
+        return self.filter(deleted_at__isnull=False)
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """Filas según deleted_at: 'live' (por defecto), 'deleted' o 'all'."""
+
+    def __init__(self, scope='live'):
+        super().__init__()
+        self.scope = scope
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.scope == 'live':
+            return queryset.live()
+        if self.scope == 'deleted':
+            return queryset.deleted()
+        return queryset
+
 class Role(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
@@ -9,6 +31,10 @@ class Role(models.Model):
     created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
     updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
     deleted_at = models.DateTimeField('Fecha de eliminación', blank=True, null=True)
+
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteManager('all')
+    deleted_objects = SoftDeleteManager('deleted')
     
 
     class Meta:
@@ -27,7 +53,7 @@ class Role(models.Model):
         self.save()
 
 
-class UserManager(BaseUserManager):
+class UserManager(SoftDeleteManager, BaseUserManager):
     def _create_user(self, username, email, name, last_name, password, is_staff, is_superuser, **extra_fields):
         user = self.model(
             username=username,
@@ -68,6 +94,8 @@ class User(AbstractBaseUser, PermissionsMixin):
 
 
     objects = UserManager()
+    all_objects = UserManager('all')
+    deleted_objects = UserManager('deleted')
 
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['email', 'name', 'last_name']
@@ -75,6 +103,9 @@ class User(AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = 'Usuario'
         verbose_name_plural = 'Usuarios'
+        indexes = [
+            models.Index(fields=['deleted_at'], name='user_deleted_at'),
+        ]
 
     def __str__(self):
         return f'{self.name} {self.last_name}'
@@ -94,6 +125,10 @@ class Category(models.Model):
     updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
     deleted_at = models.DateTimeField('Fecha de eliminación', blank=True, null=True)
 
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteManager('all')
+    deleted_objects = SoftDeleteManager('deleted')
+
     class Meta:
         verbose_name = 'Category'
         verbose_name_plural = 'Categories'
@@ -117,6 +152,10 @@ class Units(models.Model):
     updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
     deleted_at = models.DateTimeField('Fecha de eliminación', blank=True, null=True)
 
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteManager('all')
+    deleted_objects = SoftDeleteManager('deleted')
+
     class Meta:
         verbose_name = 'Unit'
         verbose_name_plural = 'Units'
@@ -140,6 +179,10 @@ class Coin(models.Model):
     created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
     updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
     deleted_at = models.DateTimeField('Fecha de eliminación', blank=True, null=True)
+
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteManager('all')
+    deleted_objects = SoftDeleteManager('deleted')
     
 
     class Meta:
@@ -168,9 +211,19 @@ class Product(models.Model):
     updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
     deleted_at = models.DateTimeField('Fecha de eliminación', blank=True, null=True)
 
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteManager('all')
+    deleted_objects = SoftDeleteManager('deleted')
+
     class Meta:
         verbose_name = 'Producto'
         verbose_name_plural = 'Productos'
+        indexes = [
+            models.Index(fields=['deleted_at'], name='product_deleted_at'),
+            models.Index(fields=['deleted_at', 'price'], name='product_live_price'),
+            models.Index(fields=['deleted_at', 'created_at'], name='product_live_created'),
+            models.Index(fields=['deleted_at', 'updated_at'], name='product_live_updated'),
+        ]
 
     def __str__(self):
         return self.name
@@ -186,19 +239,56 @@ class Product(models.Model):
 class Inventory(models.Model):
     product = models.ForeignKey(Product, on_delete=models.PROTECT, null=True, related_name='inventory')
     quantity = models.PositiveIntegerField(default=0)
+    reserved_quantity = models.PositiveIntegerField('Cantidad reservada', default=0)
+    hot_stripes = models.PositiveSmallIntegerField('Sub-contadores (SKU caliente)', default=0)
+    striped_quantity = models.PositiveIntegerField('Cantidad repartida en sub-contadores', default=0)
     total_price = models.DecimalField(decimal_places=2, max_digits=10, default=0)
     min_quantity = models.PositiveIntegerField(default=0)
+    below_min = models.BooleanField('Por debajo del mínimo', default=False)
     created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
     updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
     deleted_at = models.DateTimeField('Fecha de eliminación', blank=True, null=True)
 
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteManager('all')
+    deleted_objects = SoftDeleteManager('deleted')
+
     class Meta:
         verbose_name = 'Inventario'
         verbose_name_plural = 'Inventarios'
+        constraints = [
+            models.UniqueConstraint(fields=['product'], name='unique_inventory_product'),
+        ]
+        indexes = [
+            models.Index(fields=['below_min', 'deleted_at', 'id'], name='inventory_live_below_min'),
+            models.Index(fields=['deleted_at'], name='inventory_deleted_at'),
+            models.Index(fields=['deleted_at', 'quantity'], name='inventory_live_quantity'),
+            models.Index(fields=['deleted_at', 'created_at'], name='inventory_live_created'),
+            models.Index(fields=['deleted_at', 'updated_at'], name='inventory_live_updated'),
+        ]
 
     def __str__(self):
         return f"Inventario de {self.product_id.name}"
 
+    @property
+    def row_available(self):
+        return self.quantity - self.reserved_quantity - self.striped_quantity
+
+    @property
+    def available(self):
+        # En un SKU caliente lo vendible vive en los sub-contadores; quantity
+        # solo se pone al día cuando se pliegan.
+        available = self.row_available
+        if self.hot_stripes:
+            available += sum(stripe.quantity for stripe in self.stripes.all())
+        return available
+
+    def save(self, *args, **kwargs):
+        self.below_min = self.quantity < self.min_quantity
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'below_min'}
+        super().save(*args, **kwargs)
+
     def delete(self, *args, **kwargs):
         self.deleted_at = timezone.now()
         self.save()
@@ -214,9 +304,20 @@ class Input(models.Model):
     updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
     deleted_at = models.DateTimeField('Fecha de eliminación', blank=True, null=True)
 
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteManager('all')
+    deleted_objects = SoftDeleteManager('deleted')
+
     class Meta:
         verbose_name = 'Entrada'
         verbose_name_plural = 'Entradas'
+        indexes = [
+            models.Index(fields=['deleted_at', 'created_at', 'id'], name='input_live_created_id'),
+            models.Index(fields=['deleted_at'], name='input_deleted_at'),
+            models.Index(fields=['inventory', 'deleted_at', 'created_at', 'id'], name='input_inventory_live'),
+            models.Index(fields=['deleted_at', 'updated_at'], name='input_live_updated'),
+            models.Index(fields=['deleted_at', 'quantity'], name='input_live_quantity'),
+        ]
 
     def __str__(self):
         return f"Input #{self.pk}"
@@ -236,9 +337,20 @@ class Output(models.Model):
     updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
     deleted_at = models.DateTimeField('Fecha de eliminación', blank=True, null=True)
 
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteManager('all')
+    deleted_objects = SoftDeleteManager('deleted')
+
     class Meta:
         verbose_name = 'Salida'
         verbose_name_plural = 'Salidas'
+        indexes = [
+            models.Index(fields=['deleted_at', 'created_at', 'id'], name='output_live_created_id'),
+            models.Index(fields=['deleted_at'], name='output_deleted_at'),
+            models.Index(fields=['inventory', 'deleted_at', 'created_at', 'id'], name='output_inventory_live'),
+            models.Index(fields=['deleted_at', 'updated_at'], name='output_live_updated'),
+            models.Index(fields=['deleted_at', 'quantity'], name='output_live_quantity'),
+        ]
 
     def __str__(self):
         return f"Output #{self.pk}"
@@ -259,11 +371,23 @@ class Detail(models.Model):
     created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
     updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
     deleted_at = models.DateTimeField('Fecha de eliminación', blank=True, null=True)
+
     bill = models.ForeignKey('Bill', on_delete=models.PROTECT, null=True, related_name='details') 
 
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteManager('all')
+    deleted_objects = SoftDeleteManager('deleted')
+
     class Meta:
         verbose_name = 'Detalle'
         verbose_name_plural = 'Detalles'
+        indexes = [
+            models.Index(fields=['deleted_at', 'created_at', 'id'], name='detail_live_created_id'),
+            models.Index(fields=['deleted_at'], name='detail_deleted_at'),
+            models.Index(fields=['inventory', 'deleted_at', 'created_at', 'id'], name='detail_inventory_live'),
+            models.Index(fields=['bill', 'deleted_at', 'id'], name='detail_bill_live'),
+            models.Index(fields=['deleted_at', 'updated_at'], name='detail_live_updated'),
+        ]
 
     def _str_(self):
         return f"Detail #{self.pk}"
@@ -284,9 +408,21 @@ class Bill(models.Model):
     updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
     deleted_at = models.DateTimeField('Fecha de eliminación', blank=True, null=True)
 
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteManager('all')
+    deleted_objects = SoftDeleteManager('deleted')
+
     class Meta:
         verbose_name = 'Bill'
         verbose_name_plural = 'Bills'
+        indexes = [
+            models.Index(fields=['deleted_at', 'created_at', 'id'], name='bill_live_created_id'),
+            models.Index(fields=['deleted_at'], name='bill_deleted_at'),
+            models.Index(fields=['user', 'deleted_at', 'created_at', 'id'], name='bill_user_live'),
+            models.Index(fields=['deleted_at', 'updated_at'], name='bill_live_updated'),
+            models.Index(fields=['deleted_at', 'date'], name='bill_live_date'),
+            models.Index(fields=['deleted_at', 'total_price'], name='bill_live_total_price'),
+        ]
 
     def _str_(self):
         return f"Bill #{self.pk}"
@@ -305,3 +441,204 @@ class RolePermission(models.Model):
 
     class Meta:
         unique_together = ('role', 'permission')
+
+class StockMovement(models.Model):
+    INPUT = 'input'
+    OUTPUT = 'output'
+    KIND_CHOICES = [
+        (INPUT, 'Entrada'),
+        (OUTPUT, 'Salida'),
+    ]
+
+    inventory = models.ForeignKey(Inventory, on_delete=models.PROTECT, related_name='movements')
+    quantity = models.IntegerField()
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    created_at = models.DateTimeField('Fecha de creación', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Movimiento de stock'
+        verbose_name_plural = 'Movimientos de stock'
+        indexes = [
+            models.Index(fields=['inventory', 'created_at'], name='movement_inventory_created'),
+        ]
+
+    def __str__(self):
+        return f"Movement #{self.pk}"
+
+class StockCheckpoint(models.Model):
+    inventory = models.ForeignKey(Inventory, on_delete=models.PROTECT, related_name='checkpoints')
+    quantity = models.PositiveIntegerField()
+    last_movement = models.ForeignKey(StockMovement, on_delete=models.PROTECT, null=True, related_name='+')
+    taken_at = models.DateTimeField('Fecha del corte', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Corte de stock'
+        verbose_name_plural = 'Cortes de stock'
+        indexes = [
+            models.Index(fields=['inventory', 'taken_at'], name='checkpoint_inventory_taken'),
+        ]
+
+    def __str__(self):
+        return f"Checkpoint #{self.pk}"
+
+class DailyMovement(models.Model):
+    inventory = models.ForeignKey(Inventory, on_delete=models.PROTECT, related_name='daily_movements')
+    day = models.DateField('Día')
+    input_quantity = models.PositiveIntegerField(default=0)
+    output_quantity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Movimiento diario'
+        verbose_name_plural = 'Movimientos diarios'
+        constraints = [
+            models.UniqueConstraint(fields=['inventory', 'day'], name='unique_daily_movement'),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='daily_movement_day'),
+        ]
+
+    def __str__(self):
+        return f"Movimientos del {self.day}"
+
+class StockEvent(models.Model):
+    LOW_STOCK = 'low_stock'
+    RESTOCKED = 'restocked'
+    ZEROED = 'zeroed'
+    KIND_CHOICES = [
+        (LOW_STOCK, 'Por debajo del mínimo'),
+        (RESTOCKED, 'Repuesto'),
+        (ZEROED, 'Agotado'),
+    ]
+
+    inventory = models.ForeignKey(Inventory, on_delete=models.PROTECT, related_name='events')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    quantity = models.PositiveIntegerField()
+    min_quantity = models.PositiveIntegerField()
+    created_at = models.DateTimeField('Fecha de creación', default=timezone.now)
+    dispatched_at = models.DateTimeField('Fecha de envío', blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    next_attempt_at = models.DateTimeField('Próximo intento', blank=True, null=True)
+
+    class Meta:
+        verbose_name = 'Evento de stock'
+        verbose_name_plural = 'Eventos de stock'
+        indexes = [
+            models.Index(fields=['dispatched_at', 'id'], name='stock_event_pending'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk}"
+
+class Reservation(models.Model):
+    ACTIVE = 'active'
+    CONFIRMED = 'confirmed'
+    RELEASED = 'released'
+    EXPIRED = 'expired'
+    STATUS_CHOICES = [
+        (ACTIVE, 'Activa'),
+        (CONFIRMED, 'Confirmada'),
+        (RELEASED, 'Liberada'),
+        (EXPIRED, 'Vencida'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.PROTECT, null=True, related_name='reservations')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=ACTIVE)
+    expires_at = models.DateTimeField('Fecha de vencimiento')
+    bill = models.ForeignKey(Bill, on_delete=models.PROTECT, null=True, blank=True, related_name='reservations')
+    created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
+    updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Reserva'
+        verbose_name_plural = 'Reservas'
+        indexes = [
+            models.Index(fields=['status', 'expires_at'], name='reservation_status_expires'),
+        ]
+
+    def __str__(self):
+        return f"Reserva #{self.pk}"
+
+class ReservationLine(models.Model):
+    reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE, related_name='lines')
+    inventory = models.ForeignKey(Inventory, on_delete=models.PROTECT, related_name='reservation_lines')
+    quantity = models.PositiveIntegerField()
+
+    class Meta:
+        verbose_name = 'Línea de reserva'
+        verbose_name_plural = 'Líneas de reserva'
+
+    def __str__(self):
+        return f"Línea de reserva #{self.pk}"
+
+class IdempotencyKey(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    endpoint = models.CharField('Ruta', max_length=200)
+    key = models.CharField('Clave', max_length=255)
+    request_hash = models.CharField('Huella de la petición', max_length=64)
+    status_code = models.PositiveSmallIntegerField(blank=True, null=True)
+    response = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
+    expires_at = models.DateTimeField('Fecha de vencimiento', db_index=True)
+
+    class Meta:
+        verbose_name = 'Clave de idempotencia'
+        verbose_name_plural = 'Claves de idempotencia'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'endpoint', 'key'], name='unique_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return self.key
+
+class PendingCheckout(models.Model):
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pendiente'),
+        (DONE, 'Facturada'),
+        (FAILED, 'Fallida'),
+    ]
+
+    reservation = models.OneToOneField(Reservation, on_delete=models.CASCADE, related_name='pending_checkout')
+    user = models.ForeignKey(User, on_delete=models.PROTECT, null=True, related_name='pending_checkouts')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    total_price = models.DecimalField(decimal_places=2, max_digits=10, default=0)
+    prices = models.JSONField('Precios cobrados', default=dict)
+    bill = models.ForeignKey(Bill, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
+    processed_at = models.DateTimeField('Fecha de proceso', blank=True, null=True)
+
+    class Meta:
+        verbose_name = 'Venta en cola'
+        verbose_name_plural = 'Ventas en cola'
+        indexes = [
+            models.Index(fields=['status', 'id'], name='pending_checkout_status'),
+        ]
+
+    @property
+    def provisional_number(self):
+        return f"P-{self.pk:08d}"
+
+    def __str__(self):
+        return self.provisional_number
+
+class StockStripe(models.Model):
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='stripes')
+    slot = models.PositiveSmallIntegerField()
+    quantity = models.PositiveIntegerField(default=0)
+    sold = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Sub-contador de stock'
+        verbose_name_plural = 'Sub-contadores de stock'
+        constraints = [
+            models.UniqueConstraint(fields=['inventory', 'slot'], name='unique_stock_stripe'),
+        ]
+
+    def __str__(self):
+        return f"Sub-contador {self.slot} del inventario {self.inventory_id}"
@@ -1,10 +1,14 @@
 from rest_framework.permissions import BasePermission
+from .models import RolePermission
 
 class CustomPermission(BasePermission):
     def has_permission(self, request, view):
-        if request.user.is_authenticated and request.user.role:
-            permissions = request.user.role.rolepermission_set.all()
-            for permission in permissions:
-                if permission.permission.codename in view.required_permissions:
-                    return True
-        return False
\ No newline at end of file
+        if request.user.is_authenticated and request.user.role_id:
+            required_permissions = view.required_permissions
+            if isinstance(required_permissions, str):
+                required_permissions = [required_permissions]
+            return RolePermission.objects.filter(
+                role_id=request.user.role_id,
+                permission__codename__in=required_permissions
+            ).exists()
+        return False
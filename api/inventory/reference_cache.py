@@ -0,0 +1,75 @@
+import hashlib
+import time
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from .conditional import query_fingerprint
+
+PREFIX = 'reference'
+
+MODELS = ('inventory.Role', 'inventory.Category', 'inventory.Units', 'inventory.Coin')
+
+
+def version_key(model):
+    return f'{PREFIX}:{model._meta.label_lower}:version'
+
+
+def get_version(model):
+    """Versión vigente de los datos de un modelo de referencia.
+
+    Si el contador no existe (caché nueva o expulsado) se crea con la hora
+    actual y no con 1, para no volver a servir respuestas de una versión vieja.
+    """
+    key = version_key(model)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(model):
+    """Invalida las respuestas guardadas del modelo al confirmarse la transacción."""
+    def bump():
+        key = version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+    transaction.on_commit(bump)
+
+
+def bump_on_write(sender, **kwargs):
+    bump_version(sender)
+
+
+def connect():
+    """Cualquier save() o delete() de un modelo de referencia sube su versión: vistas, seeders o admin.
+
+    Los borrados lógicos pasan por save(). Un QuerySet.update() no emite
+    señales: quien lo use debe llamar a bump_version.
+    """
+    for label in MODELS:
+        model = apps.get_model(label)
+        post_save.connect(bump_on_write, sender=model, dispatch_uid=f'{PREFIX}-save-{label}')
+        post_delete.connect(bump_on_write, sender=model, dispatch_uid=f'{PREFIX}-delete-{label}')
+
+
+def response_key(model, request):
+    """Clave de la respuesta para la versión vigente.
+
+    Se calcula una sola vez por petición: si el contador sube mientras se arma
+    la respuesta, esta queda guardada bajo la versión vieja y nadie la lee.
+    """
+    digest = hashlib.sha1(query_fingerprint(request).encode('utf-8')).hexdigest()
+    return f'{PREFIX}:{model._meta.label_lower}:{get_version(model)}:{digest}'
+
+
+def get_response(key):
+    return cache.get(key)
+
+
+def set_response(key, entry):
+    cache.set(key, entry, settings.REFERENCE_CACHE_TIMEOUT)
@@ -0,0 +1,130 @@
+from decimal import Decimal
+from functools import lru_cache
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+from .serializer import sparse_fields
+
+ISO_8601 = 'iso-8601'
+
+
+def is_iso_8601(output_format):
+    return isinstance(output_format, str) and output_format.lower() == ISO_8601
+
+
+# Campos cuya representación en DRF no cambia el valor que ya trae la base.
+PLAIN_FIELDS = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.BooleanField,
+    serializers.ChoiceField,
+    serializers.ReadOnlyField,
+)
+
+
+class RowPlan:
+    """Columnas de .values_list() y conversores precompilados para un serializador de lectura.
+
+    Produce la misma salida que ``serializer.data`` sin instanciar modelos ni
+    recorrer campos de DRF por fila. Las columnas que no existen en el modelo
+    (propiedades como ``available``) se piden como anotaciones.
+    """
+
+    def __init__(self, serializer, annotations=None):
+        self.model = serializer.Meta.model
+        self.annotations = annotations or {}
+        self.aliases = {}
+        self.columns = [self.model._meta.pk.attname]
+        self.build = self.compile(serializer, self.model, '')
+
+    def column(self, path):
+        if path not in self.columns:
+            self.columns.append(path)
+        return self.columns.index(path)
+
+    def compile(self, serializer, model, prefix):
+        entries = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.BaseSerializer):
+                if isinstance(field, serializers.ListSerializer) or '.' in field.source:
+                    raise ValueError(f"'{name}' no se puede leer por columnas")
+                relation = model._meta.get_field(field.source)
+                index = self.column(prefix + relation.attname)
+                nested = self.compile(field, relation.related_model, f'{prefix}{field.source}__')
+                entries.append((name, index, nested, True))
+                continue
+
+            path = prefix + field.source.replace('.', '__')
+            index = self.column(self.lookup(model, field.source, path))
+            entries.append((name, index, self.converter(model, field), False))
+
+        def build(row):
+            data = {}
+            for name, index, convert, nested in entries:
+                value = row[index]
+                if value is not None and convert is not None:
+                    value = convert(row) if nested else convert(value)
+                data[name] = value
+            return data
+        return build
+
+    def lookup(self, model, source, path):
+        if '.' not in source:
+            try:
+                model._meta.get_field(source)
+            except FieldDoesNotExist:
+                if path not in self.annotations:
+                    raise ValueError(f"'{source}' no es una columna de {model.__name__}")
+                self.aliases[f'row_{path}'] = self.annotations[path]
+                return f'row_{path}'
+        return path
+
+    def converter(self, model, field):
+        if isinstance(field, serializers.DecimalField):
+            coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+            if coerce_to_string and field.decimal_places is not None and not (field.normalize_output or field.localize):
+                exponent = Decimal(1).scaleb(-field.decimal_places)
+                return lambda value: '{:f}'.format(value.quantize(exponent))
+        elif isinstance(field, serializers.DateTimeField):
+            if is_iso_8601(getattr(field, 'format', api_settings.DATETIME_FORMAT)):
+                timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+                def datetime_converter(value):
+                    if timezone is not None:
+                        value = value.astimezone(timezone)
+                    value = value.isoformat()
+                    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+                return datetime_converter
+        elif isinstance(field, serializers.DateField):
+            if is_iso_8601(getattr(field, 'format', api_settings.DATE_FORMAT)):
+                return lambda value: value.isoformat()
+        elif isinstance(field, serializers.FileField):
+            storage = model._meta.get_field(field.source).storage
+            return lambda value: storage.url(value) if value else None
+        elif isinstance(field, (serializers.RelatedField, serializers.ManyRelatedField)):
+            raise ValueError(f"'{field.field_name}' no se puede leer por columnas")
+        elif isinstance(field, PLAIN_FIELDS):
+            return None
+        return field.to_representation
+
+    def values(self, queryset):
+        queryset = queryset.prefetch_related(None)
+        if self.aliases:
+            queryset = queryset.annotate(**self.aliases)
+        return queryset.values_list(*self.columns, named=True)
+
+    def rows(self, rows):
+        build = self.build
+        return [build(row) for row in rows]
+
+
+@lru_cache(maxsize=256)
+def compile_row_plan(view_class, fields=None, expand=None):
+    """Plan de filas de una vista de listado, o None si su serializador no se puede leer por columnas."""
+    serializer = view_class.serializer_class(sparse=sparse_fields(fields, expand))
+    try:
+        return RowPlan(serializer, view_class.row_annotations)
+    except ValueError:
+        return None
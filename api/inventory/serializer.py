@@ -1,10 +1,86 @@
 from rest_framework import serializers
+from rest_framework.utils.field_mapping import get_unique_error_message
+from rest_framework.validators import UniqueValidator
 from django.contrib.auth.hashers import make_password 
 from .models import *
 from inventory.models import User
+from django.conf import settings
+from django.utils.encoding import filepath_to_uri
 import os
+
+def sparse_fields(fields, expand=None):
+    """Traduce ?fields=id,product.name&expand=product.category a un árbol de campos.
+
+    Cada nodo es None (el campo tal cual; una relación queda como su id), '*'
+    (la relación completa, como por defecto) o un dict con sus propios campos.
+    Sin ``fields`` devuelve None y la respuesta no cambia.
+    """
+    if not fields:
+        return None
+
+    tree = {}
+    for path in fields.split(','):
+        parts = [part for part in path.strip().split('.') if part]
+        node = tree
+        for part in parts[:-1]:
+            if node.get(part) == '*':
+                break
+            if not isinstance(node.get(part), dict):
+                node[part] = {}
+            node = node[part]
+        else:
+            if parts:
+                node.setdefault(parts[-1], None)
+
+    for path in (expand or '').split(','):
+        node = tree
+        for part in (part for part in path.strip().split('.') if part):
+            if not isinstance(node.get(part), dict):
+                node[part] = '*'
+                break
+            node = node[part]
+    return tree
+
+class SparseFieldsMixin:
+    """Acepta ``sparse=`` (ver sparse_fields) para recortar la representación."""
+
+    def __init__(self, *args, **kwargs):
+        sparse = kwargs.pop('sparse', None)
+        super().__init__(*args, **kwargs)
+        if sparse is None or sparse == '*':
+            return
+
+        for name in list(self.fields):
+            if name not in sparse:
+                self.fields.pop(name)
+
+        for name, node in sparse.items():
+            field = self.fields.get(name)
+            if not isinstance(field, serializers.BaseSerializer) or node == '*':
+                continue
+            many = isinstance(field, serializers.ListSerializer)
+            nested = field.child if many else field
+            if node is None:
+                # Relación no expandida: solo su id, sin tocar la tabla relacionada.
+                if many:
+                    self.fields[name] = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+                else:
+                    self.fields[name] = serializers.ReadOnlyField(source=f'{field.source}_id')
+            else:
+                self.fields[name] = nested.__class__(*nested._args, **{**nested._kwargs, 'many': many, 'sparse': node})
+
+def unique_among_all(model, *names):
+    """extra_kwargs con la unicidad validada contra todas las filas, también las eliminadas.
+
+    ModelSerializer la valida con ``objects``, que solo ve las vivas, mientras
+    que el índice único de la base las cuenta todas.
+    """
+    return {
+        name: {'validators': [UniqueValidator(queryset=model.all_objects.all(), message=get_unique_error_message(model._meta.get_field(name)))]}
+        for name in names
+    }
   
-class RoleSerializer(serializers.ModelSerializer):
+class RoleSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Role
         fields = ['id', 
@@ -23,7 +99,7 @@ class RoleSerializer(serializers.ModelSerializer):
 
         return Role.objects.create(**validated_data)
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     role = RoleSerializer(read_only=True)
     role_id = serializers.IntegerField(write_only=True) 
 
@@ -71,10 +147,11 @@ class UserSerializer(serializers.ModelSerializer):
                   'role', ]
         extra_kwargs = {
             'password': {'write_only': True},  
+            **unique_among_all(User, 'username', 'email', 'document'),
         }
 
 
-class UserRegisterSerializer(serializers.ModelSerializer):
+class UserRegisterSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
     class Meta:
@@ -87,6 +164,7 @@ class UserRegisterSerializer(serializers.ModelSerializer):
                   'document', 
                   'address',
                   'phone_number', ]
+        extra_kwargs = unique_among_all(User, 'username', 'email', 'document')
 
     def validate_password(self, value):
         if len(value) < 8:
@@ -102,7 +180,7 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         validated_data['password'] = make_password(validated_data['password']) 
         return super(UserRegisterSerializer, self).create(validated_data)
     
-class UserRegisterClientSerializer(serializers.ModelSerializer):
+class UserRegisterClientSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False)
 
     class Meta:
@@ -115,6 +193,7 @@ class UserRegisterClientSerializer(serializers.ModelSerializer):
                   'document', 
                   'address',
                   'phone_number', ]
+        extra_kwargs = unique_among_all(User, 'username', 'email', 'document')
 
     def create(self, validated_data):
         role_id = 3  
@@ -127,7 +206,7 @@ class UserRegisterClientSerializer(serializers.ModelSerializer):
         
         return super(UserRegisterClientSerializer, self).create(validated_data)
     
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 
@@ -145,7 +224,7 @@ class CategorySerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         return Category.objects.create(**validated_data)
     
-class UnitSerializer(serializers.ModelSerializer):
+class UnitSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Units
         fields = ['id', 
@@ -164,7 +243,7 @@ class UnitSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         return Units.objects.create(**validated_data)
     
-class CoinSerializer(serializers.ModelSerializer):
+class CoinSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Coin
         fields = ['id', 
@@ -186,11 +265,45 @@ class CoinSerializer(serializers.ModelSerializer):
  
 IMAGE_DOMAIN = os.environ.get('IMAGE_DOMAIN', 'https://dominio-por-defecto.com')
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductImageField(serializers.Field):
+    """URL pública de la imagen del producto, armada en el mismo paso que el resto de campos.
+
+    El prefijo se calcula una vez: PRODUCT_IMAGE_CDN_URL si está configurado,
+    si no PRODUCT_IMAGE_BASE_URL más la URL de medios. Con ``variants=True``
+    devuelve {nombre: url} para cada variante de PRODUCT_IMAGE_VARIANTS.
+    """
+
+    def __init__(self, variants=False, **kwargs):
+        kwargs.setdefault('source', 'img')
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+        self.variants = settings.PRODUCT_IMAGE_VARIANTS if variants else None
+        self.prefix = settings.PRODUCT_IMAGE_CDN_URL or settings.PRODUCT_IMAGE_BASE_URL + Product._meta.get_field('img').storage.base_url
+
+    def to_representation(self, value):
+        # Llega un FieldFile desde el modelo o el nombre tal cual desde .values_list().
+        name = getattr(value, 'name', value)
+        if not name:
+            return None
+        url = self.prefix + filepath_to_uri(name)
+        if self.variants is None:
+            return url
+        return {variant: url + suffix for variant, suffix in self.variants.items()}
+
+
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     units = UnitSerializer(read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), write_only=True)
     units_id = serializers.PrimaryKeyRelatedField(queryset=Units.objects.all(), write_only=True)
+    image_url = ProductImageField()
+    image_variants = ProductImageField(variants=True)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not settings.PRODUCT_IMAGE_VARIANTS:
+            fields.pop('image_variants')
+        return fields
 
     def create(self, validated_data):
         category_id = validated_data.pop('category_id', None)
@@ -220,18 +333,27 @@ class ProductSerializer(serializers.ModelSerializer):
                   'created_at',
                   'updated_at',
                   'deleted_at',  
+                  'image_url',
+                  'image_variants',
                   ]
+        extra_kwargs = {
+            'img': {'write_only': True},
+        }
         
-class InventorySerializer(serializers.ModelSerializer):
+class InventorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
     product_id = UserSerializer(write_only=True) 
+    available = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Inventory
         fields = ['id',
                   'product_id',
                   'quantity',  
+                  'reserved_quantity',
+                  'available',
                   'min_quantity',
+                  'below_min',
                   'created_at', 
                   'updated_at',
                   'deleted_at',
@@ -248,7 +370,7 @@ class InventorySerializer(serializers.ModelSerializer):
         return inventory_instance
 
 
-class InputSerializer(serializers.ModelSerializer):
+class InputSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     inventory = InventorySerializer(read_only=True)
     inventory_id = UserSerializer(write_only=True) 
     class Meta:
@@ -264,7 +386,7 @@ class InputSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         return Input.objects.create(**validated_data)
     
-class OutputSerializer(serializers.ModelSerializer):
+class OutputSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     inventory = InventorySerializer(read_only=True)
     inventory_id = UserSerializer(write_only=True) 
 
@@ -281,7 +403,7 @@ class OutputSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         return Output.objects.create(**validated_data)
 
-class BillSerializer(serializers.ModelSerializer):
+class BillSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     user_id = UserSerializer(write_only=True) 
 
@@ -296,7 +418,7 @@ class BillSerializer(serializers.ModelSerializer):
                   'deleted_at',
                   'user']
         
-class DetailSerializer(serializers.ModelSerializer):
+class DetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     inventory = InventorySerializer(read_only=True)
     bill = BillSerializer(read_only=True)
     inventory_id = UserSerializer(write_only=True) 
@@ -316,7 +438,7 @@ class DetailSerializer(serializers.ModelSerializer):
                   'inventory',
                   'bill']
         
-class BillIndexSerializer(serializers.ModelSerializer):
+class BillIndexSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     details = DetailSerializer(many=True, read_only=True)
     user = UserSerializer(read_only=True)
     user_id = UserSerializer(write_only=True) 
@@ -333,3 +455,80 @@ class BillIndexSerializer(serializers.ModelSerializer):
                   'user',
                   'details'
                 ]
+
+class BillLineSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    product_id = serializers.IntegerField(source='inventory.product_id', read_only=True)
+
+    class Meta:
+        model = Detail
+        fields = ['id',
+                  'inventory_id',
+                  'product_id',
+                  'quantity',
+                  'price_unit',
+                  'subtotal']
+
+class BillListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    details = BillLineSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Bill
+        fields = ['id',
+                  'date',
+                  'user_id',
+                  'total_price',
+                  'created_at',
+                  'updated_at',
+                  'deleted_at',
+                  'details']
+
+class DailyMovementSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    product_id = serializers.IntegerField(source='inventory.product_id', read_only=True)
+
+    class Meta:
+        model = DailyMovement
+        fields = ['id',
+                  'inventory_id',
+                  'product_id',
+                  'day',
+                  'input_quantity',
+                  'output_quantity']
+
+class ReservationLineSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    product_id = serializers.IntegerField(source='inventory.product_id', read_only=True)
+
+    class Meta:
+        model = ReservationLine
+        fields = ['id',
+                  'inventory_id',
+                  'product_id',
+                  'quantity']
+
+class ReservationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    lines = ReservationLineSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Reservation
+        fields = ['id',
+                  'user_id',
+                  'status',
+                  'expires_at',
+                  'bill_id',
+                  'created_at',
+                  'updated_at',
+                  'lines']
+
+class PendingCheckoutSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = PendingCheckout
+        fields = ['id',
+                  'provisional_number',
+                  'reservation_id',
+                  'user_id',
+                  'status',
+                  'total_price',
+                  'bill_id',
+                  'attempts',
+                  'last_error',
+                  'created_at',
+                  'processed_at']
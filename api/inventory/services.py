@@ -0,0 +1,840 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.lookups import LessThan
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, IntegerField, Max, OuterRef, Subquery, Sum, Value, When
+from django.utils import timezone
+from rest_framework import status
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import partial
+from .models import *
+
+
+class StockError(Exception):
+    status_code = status.HTTP_400_BAD_REQUEST
+
+    def __init__(self, message, **extra):
+        super().__init__(message)
+        self.detail = {"message": message, **extra}
+
+
+class InvalidLineError(StockError):
+    pass
+
+
+class InventoryNotFoundError(StockError):
+    status_code = status.HTTP_404_NOT_FOUND
+
+
+class InsufficientStockError(StockError):
+    pass
+
+
+class StockConflictError(StockError):
+    status_code = status.HTTP_409_CONFLICT
+
+
+def normalize_lines(lines):
+    if not isinstance(lines, list) or not lines:
+        raise InvalidLineError("Debe indicar al menos un producto.")
+
+    normalized = []
+    for line in lines:
+        if not isinstance(line, dict):
+            raise InvalidLineError("Cada producto debe indicar 'product_id' y 'quantity'.")
+        try:
+            product_id = int(line.get('product_id'))
+            quantity = int(line.get('quantity'))
+        except (TypeError, ValueError):
+            raise InvalidLineError("Cada producto debe indicar 'product_id' y 'quantity' numéricos.")
+        if quantity <= 0:
+            raise InvalidLineError(f"La cantidad para el producto {product_id} debe ser mayor que cero.")
+        normalized.append((product_id, quantity))
+    return normalized
+
+
+def requested_quantities(lines):
+    requested = {}
+    for product_id, quantity in lines:
+        requested[product_id] = requested.get(product_id, 0) + quantity
+    return requested
+
+
+def stock_event_kind(before, after, min_quantity):
+    if after == 0 < before:
+        return StockEvent.ZEROED
+    if after < min_quantity <= before:
+        return StockEvent.LOW_STOCK
+    if before < min_quantity <= after:
+        return StockEvent.RESTOCKED
+    return None
+
+
+def stock_event(inventory, before, after, now=None):
+    kind = stock_event_kind(before, after, inventory.min_quantity)
+    if kind:
+        return StockEvent(
+            inventory=inventory,
+            kind=kind,
+            quantity=after,
+            min_quantity=inventory.min_quantity,
+            created_at=now or timezone.now()
+        )
+    return None
+
+
+def stock_warnings(inventories):
+    warnings = []
+    for inventory in {inventory.pk: inventory for inventory in inventories}.values():
+        if inventory.quantity <= inventory.min_quantity:
+            warnings.append(f"¡La cantidad del producto {inventory.product.name} ha llegado al mínimo de {inventory.min_quantity}!")
+    return warnings
+
+
+def lock_inventories(product_ids, cold_only=False):
+    # Todas las cajas bloquean las filas en el mismo orden (el del índice de
+    # product_id), así dos ventas concurrentes nunca se esperan en círculo.
+    # El producto viaja en el mismo SELECT, pero solo se bloquea el inventario.
+    of = ('self',) if connection.features.has_select_for_update_of else ()
+    inventories = (Inventory.all_objects
+                   .select_related('product')
+                   .select_for_update(of=of)
+                   .filter(product_id__in=product_ids)
+                   .order_by('product_id'))
+    if cold_only:
+        inventories = inventories.filter(hot_stripes=0)
+    return {inventory.product_id: inventory for inventory in inventories}
+
+
+def lock_basket(requested):
+    inventories = lock_inventories(requested.keys())
+    if len(inventories) != len(requested):
+        raise InventoryNotFoundError("Uno de los productos no existe en el inventario")
+    return inventories
+
+
+def check_available(inventories, requested):
+    for product_id, quantity in requested.items():
+        inventory = inventories[product_id]
+        if inventory.row_available < quantity and inventory.hot_stripes:
+            reclaim_from_stripes(inventory, quantity - inventory.row_available)
+        if inventory.row_available < quantity:
+            raise InsufficientStockError(
+                f"La cantidad solicitada para el producto {inventory.product.name} es mayor que la cantidad en inventario",
+                **{"cantidad existente": inventory.row_available}
+            )
+
+
+@transaction.atomic
+def checkout(user, lines):
+    lines = normalize_lines(lines)
+    requested = requested_quantities(lines)
+
+    # Los SKU calientes no bloquean su fila: venden de un sub-contador.
+    inventories = lock_inventories(requested.keys(), cold_only=True)
+    if len(inventories) < len(requested):
+        inventories.update({
+            inventory.product_id: inventory for inventory in Inventory.all_objects
+            .select_related('product')
+            .filter(product_id__in=requested.keys() - inventories.keys(), hot_stripes__gt=0)
+        })
+    if len(inventories) != len(requested):
+        raise InventoryNotFoundError("Uno de los productos no existe en el inventario")
+
+    striped = {product_id for product_id, inventory in inventories.items() if inventory.hot_stripes}
+    check_available(inventories, {pid: q for pid, q in requested.items() if pid not in striped})
+    for product_id in sorted(striped):
+        inventory = inventories[product_id]
+        folded = inventory.quantity
+        inventory.quantity -= take_from_stripes(inventory, requested[product_id])
+        # La fila no se toca en la venta. Si lo vendido sin plegar la dejó
+        # por debajo del mínimo o en cero, se pliega al confirmar: así below_min
+        # y el evento de stock no esperan al próximo fold_stock_stripes.
+        if stock_event_kind(folded, inventory.quantity, inventory.min_quantity):
+            transaction.on_commit(partial(fold_stripes, [inventory.pk]), robust=True)
+    return record_sale(user, lines, inventories, striped=striped)
+
+
+def record_sale(user, lines, inventories, reserved=None, prices=None, striped=()):
+    """Descuenta el stock y registra salidas, factura y detalles.
+
+    Requiere las filas de ``inventories`` ya bloqueadas y validadas. ``reserved``
+    indica por producto cuántas unidades salen de una reserva y ``prices`` fija
+    precios ya cobrados en lugar de los vigentes. Los productos de ``striped``
+    ya se descontaron de sus sub-contadores (y de su ``quantity`` en memoria):
+    su fila se pone al día al plegarlos, pero el resumen diario se suma aquí,
+    con el día de la venta.
+    """
+    requested = requested_quantities(lines)
+    reserved = reserved or {}
+    prices = {
+        product_id: (prices or {}).get(product_id, inventory.product.price)
+        for product_id, inventory in inventories.items()
+    }
+
+    # Las filas ya están bloqueadas: los valores calculados aquí son los
+    # definitivos y cada tabla se escribe con una sola sentencia.
+    now = timezone.now()
+    events = []
+    requested_rows = {pid: quantity for pid, quantity in requested.items() if pid not in striped}
+    for product_id, quantity in requested_rows.items():
+        inventory = inventories[product_id]
+        event = stock_event(inventory, inventory.quantity, inventory.quantity - quantity, now)
+        if event:
+            events.append(event)
+        inventory.quantity -= quantity
+        inventory.reserved_quantity -= reserved.get(product_id, 0)
+        inventory.total_price = inventory.product.price * inventory.quantity
+        inventory.below_min = inventory.quantity < inventory.min_quantity
+        inventory.updated_at = now
+    Inventory.all_objects.bulk_update(
+        [inventories[product_id] for product_id in requested_rows],
+        ['quantity', 'reserved_quantity', 'total_price', 'below_min', 'updated_at']
+    )
+    StockEvent.objects.bulk_create(events)
+
+    outputs = []
+    details = []
+    total_price = Decimal(0)
+    for product_id, quantity in lines:
+        inventory = inventories[product_id]
+        subtotal = prices[product_id] * quantity
+        total_price += subtotal
+        outputs.append(Output(inventory=inventory, quantity=quantity))
+        details.append(Detail(
+            inventory=inventory,
+            quantity=quantity,
+            price_unit=prices[product_id],
+            subtotal=subtotal
+        ))
+
+    Output.all_objects.bulk_create(outputs)
+    StockMovement.objects.bulk_create([
+        StockMovement(inventory=output.inventory, quantity=-output.quantity, kind=StockMovement.OUTPUT, created_at=now)
+        for output in outputs
+    ])
+    bump_daily_movements(
+        {inventories[pid].pk: (0, quantity) for pid, quantity in requested.items()},
+        timezone.localdate(now)
+    )
+    bill = Bill.all_objects.create(user=user, total_price=total_price, date=now)
+    for detail in details:
+        detail.bill = bill
+    Detail.all_objects.bulk_create(details)
+
+    return bill, [inventories[product_id] for product_id, _ in lines]
+
+
+class ProductNotFoundError(StockError):
+    status_code = status.HTTP_404_NOT_FOUND
+
+
+def value_case(values, output_field, field='product_id'):
+    return Case(
+        *[When(**{field: key}, then=Value(value)) for key, value in values.items()],
+        default=Value(0),
+        output_field=output_field
+    )
+
+
+@transaction.atomic
+def receive(lines, default_min_quantity=5):
+    lines = normalize_lines(lines)
+    requested = requested_quantities(lines)
+
+    prices = dict(Product.all_objects.filter(pk__in=requested.keys()).values_list('id', 'price'))
+    missing = sorted(set(requested) - set(prices))
+    if missing:
+        raise ProductNotFoundError("Este producto no existe.", productos=missing)
+
+    existing = set(Inventory.all_objects.filter(product_id__in=requested.keys()).values_list('product_id', flat=True))
+    created = [pid for pid in requested if pid not in existing]
+
+    # Las filas nuevas nacen vacías y el mismo UPDATE las incrementa; si otra
+    # recepción las creó en paralelo, la restricción única las descarta aquí.
+    Inventory.all_objects.bulk_create(
+        [Inventory(product_id=pid, quantity=0, total_price=0, min_quantity=default_min_quantity, below_min=default_min_quantity > 0)
+         for pid in created],
+        ignore_conflicts=True
+    )
+
+    # total_price y below_min van antes que quantity: MySQL evalúa el SET de
+    # izquierda a derecha con los valores ya asignados, así ambos motores
+    # parten del mismo quantity original.
+    increments = value_case(requested, IntegerField())
+    Inventory.all_objects.filter(product_id__in=requested.keys()).update(
+        total_price=ExpressionWrapper(
+            (F('quantity') + increments) * value_case(prices, DecimalField()),
+            output_field=DecimalField()
+        ),
+        below_min=Case(
+            When(LessThan(F('quantity') + increments, F('min_quantity')), then=Value(True)),
+            default=Value(False)
+        ),
+        quantity=F('quantity') + increments,
+        updated_at=timezone.now()
+    )
+
+    inventories = {inventory.product_id: inventory for inventory in Inventory.all_objects.filter(product_id__in=requested.keys())}
+    for inventory in inventories.values():
+        if inventory.hot_stripes:
+            rebalance_stripes(inventory)
+    Input.all_objects.bulk_create([Input(inventory=inventories[pid], quantity=quantity) for pid, quantity in lines])
+    StockMovement.objects.bulk_create([
+        StockMovement(inventory=inventories[pid], quantity=quantity, kind=StockMovement.INPUT)
+        for pid, quantity in lines
+    ])
+    bump_daily_movements({inventories[pid].pk: (quantity, 0) for pid, quantity in requested.items()})
+    StockEvent.objects.bulk_create([
+        event for event in (
+            stock_event(inventories[pid], inventories[pid].quantity - quantity, inventories[pid].quantity)
+            for pid, quantity in requested.items()
+        ) if event
+    ])
+
+    return [{
+        "product_id": pid,
+        "quantity": quantity,
+        "Cantidad actual": inventories[pid].quantity,
+        "Precio total": inventories[pid].total_price,
+        "creado": pid in created,
+    } for pid, quantity in lines]
+
+
+def on_conflict_increment(table, key_columns, increment_columns):
+    if connection.vendor == 'mysql':
+        return "ON DUPLICATE KEY UPDATE " + ", ".join(
+            f"{column} = {column} + VALUES({column})" for column in increment_columns
+        )
+    return f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET " + ", ".join(
+        f"{column} = {table}.{column} + excluded.{column}" for column in increment_columns
+    )
+
+
+def bump_daily_movements(movements, day=None):
+    """Suma entradas y salidas al resumen diario. ``movements`` es {inventory_id: (entradas, salidas)}."""
+    if not movements:
+        return
+    day = day or timezone.localdate()
+    table = connection.ops.quote_name(DailyMovement._meta.db_table)
+    rows = ", ".join(["(%s, %s, %s, %s)"] * len(movements))
+    params = []
+    for inventory_id in sorted(movements):
+        params += [inventory_id, connection.ops.adapt_datefield_value(day), *movements[inventory_id]]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (inventory_id, day, input_quantity, output_quantity) VALUES {rows} "
+            + on_conflict_increment(table, ['inventory_id', 'day'], ['input_quantity', 'output_quantity']),
+            params
+        )
+
+
+def bump_daily_movements_for_product(product_id, input_quantity=0, output_quantity=0, day=None):
+    day = day or timezone.localdate()
+    table = connection.ops.quote_name(DailyMovement._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (inventory_id, day, input_quantity, output_quantity) "
+            f"SELECT id, %s, %s, %s FROM {connection.ops.quote_name(Inventory._meta.db_table)} WHERE product_id = %s "
+            + on_conflict_increment(table, ['inventory_id', 'day'], ['input_quantity', 'output_quantity']),
+            [connection.ops.adapt_datefield_value(day), input_quantity, output_quantity, product_id]
+        )
+
+
+def upsert_inventory(product_id, quantity=0, price=Decimal(0), min_quantity=None):
+    """Crea el inventario del producto o lo incrementa en una sola sentencia.
+
+    Devuelve la cantidad resultante y si la fila fue creada, sin volver a leerla.
+    """
+    table = connection.ops.quote_name(Inventory._meta.db_table)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    total_price = connection.ops.adapt_decimalfield_value(Decimal(price) * quantity)
+    price = connection.ops.adapt_decimalfield_value(Decimal(price))
+    initial_min = 5 if min_quantity is None else min_quantity
+    params = [product_id, quantity, 0, 0, 0, total_price, initial_min, quantity < initial_min, now, now]
+    sql = ("INSERT INTO "
+           f"{table} (product_id, quantity, reserved_quantity, hot_stripes, striped_quantity, total_price, "
+           "min_quantity, below_min, created_at, updated_at) "
+           "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s) ")
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            # LAST_INSERT_ID(expr) deja la nueva cantidad en lastrowid y MySQL
+            # informa 1 fila afectada al insertar y 2 al actualizar. Cada
+            # asignación ve los valores ya actualizados por las anteriores.
+            updates = ["quantity = LAST_INSERT_ID(quantity + VALUES(quantity))"]
+            if quantity:
+                updates.append("total_price = %s * quantity")
+                params.append(price)
+            if min_quantity is not None:
+                updates.append("min_quantity = VALUES(min_quantity)")
+            updates.append("below_min = quantity < min_quantity")
+            updates.append("updated_at = VALUES(updated_at)")
+
+            cursor.execute(sql + "ON DUPLICATE KEY UPDATE " + ", ".join(updates), params)
+            created = cursor.rowcount == 1
+            return (quantity if created else cursor.lastrowid), created
+
+        new_quantity = f"({table}.quantity + excluded.quantity)"
+        new_min = "excluded.min_quantity" if min_quantity is not None else f"{table}.min_quantity"
+        updates = [f"quantity = {new_quantity}"]
+        if quantity:
+            updates.append(f"total_price = %s * {new_quantity}")
+            params.append(price)
+        if min_quantity is not None:
+            updates.append("min_quantity = excluded.min_quantity")
+        updates.append(f"below_min = {new_quantity} < {new_min}")
+        updates.append("updated_at = excluded.updated_at")
+
+        cursor.execute(
+            sql + "ON CONFLICT (product_id) DO UPDATE SET " + ", ".join(updates) + " RETURNING quantity, created_at = %s",
+            params + [now]
+        )
+        new_quantity, created = cursor.fetchone()
+        return new_quantity, bool(created)
+
+
+def insert_for_product(model, product_id, **values):
+    # Inserta una fila ligada al inventario del producto sin leer antes su id.
+    columns = ', '.join(connection.ops.quote_name(column) for column in ['inventory_id', *values])
+    placeholders = ', '.join(['%s'] * len(values))
+    params = [
+        connection.ops.adapt_datetimefield_value(value) if isinstance(value, datetime) else value
+        for value in values.values()
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({columns}) "
+            f"SELECT id, {placeholders} FROM {connection.ops.quote_name(Inventory._meta.db_table)} WHERE product_id = %s",
+            params + [product_id]
+        )
+
+
+def record_restock_event(product_id, quantity, now):
+    # Una entrada solo puede reponer: el evento se inserta si esta cantidad
+    # hizo cruzar el mínimo, sin leer la fila desde Python.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {connection.ops.quote_name(StockEvent._meta.db_table)} "
+            "(inventory_id, kind, quantity, min_quantity, created_at, attempts) "
+            "SELECT id, %s, quantity, min_quantity, %s, 0 "
+            f"FROM {connection.ops.quote_name(Inventory._meta.db_table)} "
+            "WHERE product_id = %s AND quantity >= min_quantity AND quantity < min_quantity + %s",
+            [StockEvent.RESTOCKED, connection.ops.adapt_datetimefield_value(now), product_id, quantity]
+        )
+
+
+@transaction.atomic
+def add_stock(product_id, quantity):
+    [(product_id, quantity)] = normalize_lines([{'product_id': product_id, 'quantity': quantity}])
+
+    price = Product.all_objects.filter(pk=product_id).values_list('price', flat=True).first()
+    if price is None:
+        raise ProductNotFoundError("Este producto no existe.")
+
+    new_quantity, created = upsert_inventory(product_id, quantity, price)
+
+    now = timezone.now()
+    insert_for_product(Input, product_id, quantity=quantity, created_at=now, updated_at=now)
+    insert_for_product(StockMovement, product_id, quantity=quantity, kind=StockMovement.INPUT, created_at=now)
+    bump_daily_movements_for_product(product_id, input_quantity=quantity, day=timezone.localdate(now))
+    record_restock_event(product_id, quantity, now)
+
+    # La fila ya está bloqueada por el upsert; en un SKU caliente el nuevo
+    # stock se reparte en seguida entre sus sub-contadores.
+    inventory = Inventory.all_objects.filter(product_id=product_id, hot_stripes__gt=0).first()
+    if inventory:
+        rebalance_stripes(inventory)
+        new_quantity = inventory.quantity
+
+    return new_quantity, price * new_quantity, created
+
+
+def set_min_quantity(product_id, min_quantity):
+    try:
+        min_quantity = int(min_quantity)
+    except (TypeError, ValueError):
+        raise InvalidLineError("El campo 'min_quantity' debe ser un número entero.")
+    if min_quantity < 0:
+        raise InvalidLineError("El campo 'min_quantity' no puede ser negativo.")
+
+    if not Product.all_objects.filter(pk=product_id).exists():
+        raise ProductNotFoundError("Este producto no existe.")
+
+    _, created = upsert_inventory(product_id, min_quantity=min_quantity)
+    return min_quantity, created
+
+
+def quantity_as_of(inventory_id, moment, inclusive=True):
+    """Cantidad del inventario en ``moment``: último corte anterior más los movimientos posteriores a él.
+
+    Un movimiento entra después del corte si es más nuevo por id y por fecha:
+    los que copia stock_checkpoints --backfill tienen ids nuevos pero fechas
+    viejas y el corte ya los incluye.
+    """
+    checkpoint = (StockCheckpoint.objects
+                  .filter(inventory_id=inventory_id, taken_at__lte=moment)
+                  .order_by('-taken_at')
+                  .first())
+
+    movements = StockMovement.objects.filter(inventory_id=inventory_id)
+    movements = movements.filter(created_at__lte=moment) if inclusive else movements.filter(created_at__lt=moment)
+    base = 0
+    if checkpoint:
+        base = checkpoint.quantity
+        movements = movements.filter(created_at__gte=checkpoint.taken_at)
+        if checkpoint.last_movement_id:
+            movements = movements.filter(pk__gt=checkpoint.last_movement_id)
+
+    return base + (movements.aggregate(total=Sum('quantity'))['total'] or 0)
+
+
+@transaction.atomic
+def take_checkpoints(inventory_ids):
+    # Con la fila del inventario bloqueada no puede haber movimientos en vuelo,
+    # así el último id de movimiento marca exactamente qué incluye el corte.
+    inventories = list(Inventory.all_objects.select_for_update().filter(pk__in=inventory_ids).order_by('product_id'))
+    # Las ventas de un SKU caliente retienen un sub-contador, no la fila: se
+    # bloquean también y lo vendido sin plegar se descuenta del corte.
+    unfolded = {}
+    for inventory_id, sold in (StockStripe.objects
+                               .select_for_update()
+                               .filter(inventory_id__in=inventory_ids)
+                               .order_by('inventory_id', 'slot')
+                               .values_list('inventory_id', 'sold')):
+        unfolded[inventory_id] = unfolded.get(inventory_id, 0) + sold
+    last_movements = dict(StockMovement.objects
+                          .filter(inventory_id__in=inventory_ids)
+                          .values('inventory_id')
+                          .annotate(last=Max('id'))
+                          .values_list('inventory_id', 'last'))
+    now = timezone.now()
+    return StockCheckpoint.objects.bulk_create([
+        StockCheckpoint(
+            inventory=inventory,
+            quantity=inventory.quantity - unfolded.get(inventory.pk, 0),
+            last_movement_id=last_movements.get(inventory.pk),
+            taken_at=now
+        ) for inventory in inventories
+    ])
+
+
+def revalue_inventories(inventories):
+    """Recalcula total_price con el precio vigente del producto en un solo UPDATE.
+
+    Solo toca las filas cuyo valor cambia, así su updated_at sigue siendo fiable.
+    """
+    valuation = ExpressionWrapper(
+        F('quantity') * Subquery(Product.all_objects.filter(pk=OuterRef('product_id')).values('price')[:1]),
+        output_field=DecimalField()
+    )
+    return (inventories
+            .filter(product_id__isnull=False)
+            .exclude(total_price=valuation)
+            .update(total_price=valuation, updated_at=timezone.now()))
+
+
+class ReservationNotFoundError(StockError):
+    status_code = status.HTTP_404_NOT_FOUND
+
+
+class ReservationStateError(StockError):
+    status_code = status.HTTP_409_CONFLICT
+
+
+@transaction.atomic
+def reserve(user, lines, ttl=None):
+    """Retiene stock sin descontarlo: solo sube reserved_quantity del inventario."""
+    lines = normalize_lines(lines)
+    if ttl is not None:
+        try:
+            ttl = int(ttl)
+        except (TypeError, ValueError):
+            raise InvalidLineError("El campo 'ttl' debe ser un número entero de segundos.")
+        if ttl <= 0:
+            raise InvalidLineError("El campo 'ttl' debe ser mayor que cero.")
+    requested = requested_quantities(lines)
+    inventories = lock_basket(requested)
+    check_available(inventories, requested)
+
+    now = timezone.now()
+    for product_id, quantity in requested.items():
+        inventories[product_id].reserved_quantity += quantity
+        inventories[product_id].updated_at = now
+    Inventory.all_objects.bulk_update([inventories[product_id] for product_id in requested], ['reserved_quantity', 'updated_at'])
+
+    reservation = Reservation.objects.create(
+        user=user,
+        expires_at=now + timedelta(seconds=ttl or settings.RESERVATION_TTL_SECONDS)
+    )
+    ReservationLine.objects.bulk_create([
+        ReservationLine(reservation=reservation, inventory=inventories[product_id], quantity=quantity)
+        for product_id, quantity in lines
+    ])
+    return reservation, [inventories[product_id] for product_id, _ in lines]
+
+
+def lock_reservation(reservation_id):
+    # Siempre se bloquea la reserva antes que sus inventarios.
+    reservation = Reservation.objects.select_for_update().filter(pk=reservation_id).first()
+    if reservation is None:
+        raise ReservationNotFoundError("Esta reserva no existe.")
+    if reservation.status != Reservation.ACTIVE:
+        raise ReservationStateError(f"La reserva ya no está activa: {reservation.get_status_display().lower()}.")
+    return reservation
+
+
+def free_reservations(reservation_ids):
+    """Devuelve al disponible lo retenido por reservas ya bloqueadas."""
+    held = dict(ReservationLine.objects
+                .filter(reservation_id__in=reservation_ids)
+                .values('inventory_id')
+                .annotate(total=Sum('quantity'))
+                .values_list('inventory_id', 'total'))
+    if not held:
+        return
+    # Bloqueo explícito en el orden de las ventas antes del UPDATE.
+    list(Inventory.all_objects.select_for_update().filter(pk__in=held.keys()).order_by('product_id').values_list('id'))
+    Inventory.all_objects.filter(pk__in=held.keys()).update(
+        reserved_quantity=F('reserved_quantity') - value_case(held, IntegerField(), field='pk'),
+        updated_at=timezone.now()
+    )
+
+
+@transaction.atomic
+def confirm_reservation(reservation_id, user=None, prices=None):
+    reservation = lock_reservation(reservation_id)
+    if reservation.expires_at <= timezone.now():
+        raise ReservationStateError("La reserva está vencida.")
+
+    lines = list(reservation.lines.order_by('id').values_list('inventory__product_id', 'quantity'))
+    requested = requested_quantities(lines)
+    inventories = lock_basket(requested)
+    # La venta sale de la fila: en un SKU caliente se pliega antes lo vendido
+    # en sus sub-contadores, para comparar el mínimo con la cantidad real.
+    for product_id in sorted(requested):
+        if inventories[product_id].hot_stripes:
+            rebalance_stripes(inventories[product_id])
+    for product_id, quantity in requested.items():
+        if inventories[product_id].quantity < quantity:
+            raise InsufficientStockError(
+                f"La cantidad reservada para el producto {inventories[product_id].product.name} ya no está en inventario",
+                **{"cantidad existente": inventories[product_id].quantity}
+            )
+
+    bill, line_inventories = record_sale(user or reservation.user, lines, inventories, reserved=requested, prices=prices)
+    reservation.status = Reservation.CONFIRMED
+    reservation.bill = bill
+    reservation.save(update_fields=['status', 'bill', 'updated_at'])
+    return reservation, line_inventories
+
+
+@transaction.atomic
+def release_reservation(reservation_id):
+    reservation = lock_reservation(reservation_id)
+    free_reservations([reservation.pk])
+    reservation.status = Reservation.RELEASED
+    reservation.save(update_fields=['status', 'updated_at'])
+    return reservation
+
+
+@transaction.atomic
+def expire_reservations(batch=500, now=None):
+    """Vence un lote de reservas; las que otra transacción tiene bloqueadas se saltan."""
+    now = now or timezone.now()
+    reservation_ids = list(Reservation.objects
+                           .select_for_update(skip_locked=True)
+                           .filter(status=Reservation.ACTIVE, expires_at__lte=now)
+                           .order_by('expires_at', 'id')
+                           .values_list('id', flat=True)[:batch])
+    if reservation_ids:
+        free_reservations(reservation_ids)
+        Reservation.objects.filter(pk__in=reservation_ids).update(status=Reservation.EXPIRED, updated_at=now)
+    return len(reservation_ids)
+
+
+@transaction.atomic
+def enqueue_checkout(user, lines):
+    """Reserva el stock y deja la venta en cola; la factura la escribe process_pending_checkouts."""
+    reservation, line_inventories = reserve(user, lines, settings.CHECKOUT_QUEUE_HOLD_SECONDS)
+    prices = {inventory.product_id: inventory.product.price for inventory in line_inventories}
+    total_price = sum(
+        (prices[product_id] * quantity for product_id, quantity in normalize_lines(lines)),
+        Decimal(0)
+    )
+    pending = PendingCheckout.objects.create(
+        reservation=reservation,
+        user=user,
+        total_price=total_price,
+        prices={str(product_id): str(price) for product_id, price in prices.items()}
+    )
+    return pending, line_inventories
+
+
+def fail_pending_checkout(pending, error):
+    pending.status = PendingCheckout.FAILED
+    pending.last_error = error
+    try:
+        with transaction.atomic():
+            release_reservation(pending.reservation_id)
+    except StockError:
+        pass
+
+
+def process_pending_checkouts(batch=50, max_attempts=5):
+    """Escribe un lote de ventas en cola en una sola transacción.
+
+    Cada venta va en su propio savepoint: una que falla no deshace las demás.
+    skip_locked permite varios trabajadores en paralelo sin repetir ventas.
+    """
+    with transaction.atomic():
+        pendings = list(PendingCheckout.objects
+                        .select_for_update(skip_locked=True)
+                        .filter(status=PendingCheckout.PENDING)
+                        .order_by('id')[:batch])
+        for pending in pendings:
+            pending.attempts += 1
+            try:
+                with transaction.atomic():
+                    prices = {int(product_id): Decimal(price) for product_id, price in pending.prices.items()}
+                    reservation, _ = confirm_reservation(pending.reservation_id, prices=prices)
+            except StockError as e:
+                fail_pending_checkout(pending, e.detail['message'])
+            except Exception as e:
+                if pending.attempts >= max_attempts:
+                    fail_pending_checkout(pending, str(e))
+                else:
+                    pending.last_error = str(e)
+            else:
+                pending.status = PendingCheckout.DONE
+                pending.bill = reservation.bill
+                pending.last_error = None
+            pending.processed_at = timezone.now()
+        PendingCheckout.objects.bulk_update(
+            pendings, ['status', 'bill', 'attempts', 'last_error', 'processed_at']
+        )
+    return len(pendings)
+
+
+def stripe_shares(pool, count):
+    return [pool // count + (1 if slot < pool % count else 0) for slot in range(count)]
+
+
+def take_from_stripes(inventory, quantity):
+    """Descuenta la venta de un sub-contador del SKU caliente sin tocar la fila del inventario.
+
+    Devuelve lo vendido sin plegar en todos sus sub-contadores, esta venta incluida.
+    """
+    # skip_locked: cada venta toma un sub-contador que nadie está usando.
+    stripe = (StockStripe.objects
+              .select_for_update(skip_locked=True)
+              .filter(inventory_id=inventory.pk, quantity__gte=quantity)
+              .order_by('?')
+              .first())
+    if stripe:
+        StockStripe.objects.filter(pk=stripe.pk).update(quantity=F('quantity') - quantity, sold=F('sold') + quantity, updated_at=timezone.now())
+        return unfolded_sold(inventory)
+
+    # Ninguno libre alcanza solo: se bloquean todos en orden y se reparte la venta.
+    stripes = list(StockStripe.objects.select_for_update().filter(inventory_id=inventory.pk).order_by('slot'))
+    if not stripes:
+        raise StockConflictError(f"El producto {inventory.product.name} cambió de modo de venta, intente de nuevo.")
+    total = sum(stripe.quantity for stripe in stripes)
+    if total < quantity:
+        raise InsufficientStockError(
+            f"La cantidad solicitada para el producto {inventory.product.name} es mayor que la cantidad en inventario",
+            **{"cantidad existente": total}
+        )
+    pending = quantity
+    now = timezone.now()
+    for stripe in stripes:
+        taken = min(stripe.quantity, pending)
+        stripe.quantity -= taken
+        stripe.sold += taken
+        stripe.updated_at = now
+        pending -= taken
+    StockStripe.objects.bulk_update(stripes, ['quantity', 'sold', 'updated_at'])
+    return sum(stripe.sold for stripe in stripes)
+
+
+def unfolded_sold(inventory):
+    return StockStripe.objects.filter(inventory_id=inventory.pk).aggregate(total=Sum('sold'))['total'] or 0
+
+
+def reclaim_from_stripes(inventory, quantity):
+    """Devuelve a la fila (ya bloqueada) stock repartido en sub-contadores, p. ej. para reservarlo."""
+    stripes = list(StockStripe.objects.select_for_update().filter(inventory_id=inventory.pk).order_by('slot'))
+    now = timezone.now()
+    for stripe in stripes:
+        taken = min(stripe.quantity, quantity)
+        stripe.quantity -= taken
+        stripe.updated_at = now
+        inventory.striped_quantity -= taken
+        quantity -= taken
+    StockStripe.objects.bulk_update(stripes, ['quantity', 'updated_at'])
+    Inventory.all_objects.filter(pk=inventory.pk).update(striped_quantity=inventory.striped_quantity, updated_at=now)
+
+
+def rebalance_stripes(inventory, count=None):
+    """Pliega lo vendido en los sub-contadores sobre la fila (ya bloqueada) y reparte de nuevo el stock libre.
+
+    ``count`` cambia el número de sub-contadores; 0 vuelve al modo normal.
+    Devuelve las unidades plegadas.
+    """
+    count = inventory.hot_stripes if count is None else count
+    stripes = {stripe.slot: stripe for stripe in
+               StockStripe.objects.select_for_update().filter(inventory_id=inventory.pk).order_by('slot')}
+    sold = sum(stripe.sold for stripe in stripes.values())
+
+    now = timezone.now()
+    before = inventory.quantity
+    inventory.quantity -= sold
+    pool = inventory.quantity - inventory.reserved_quantity if count else 0
+    inventory.hot_stripes = count
+    inventory.striped_quantity = pool
+    inventory.total_price = Product.all_objects.values_list('price', flat=True).get(pk=inventory.product_id) * inventory.quantity
+    inventory.updated_at = now
+    inventory.save(update_fields=['quantity', 'hot_stripes', 'striped_quantity', 'total_price', 'updated_at'])
+
+    shares = stripe_shares(pool, count) if count else []
+    StockStripe.objects.filter(inventory_id=inventory.pk, slot__gte=count).delete()
+    for slot, share in enumerate(shares):
+        stripe = stripes.get(slot) or StockStripe(inventory=inventory, slot=slot)
+        stripe.quantity = share
+        stripe.sold = 0
+        stripe.updated_at = now
+        stripes[slot] = stripe
+    StockStripe.objects.bulk_update([stripes[slot] for slot in range(count) if stripes[slot].pk], ['quantity', 'sold', 'updated_at'])
+    StockStripe.objects.bulk_create([stripes[slot] for slot in range(count) if not stripes[slot].pk])
+
+    if sold:
+        event = stock_event(inventory, before, inventory.quantity, now)
+        if event:
+            event.save()
+    return sold
+
+
+@transaction.atomic
+def fold_stripes(inventory_ids=None):
+    """Pliega los sub-contadores de los SKU calientes indicados (o de todos)."""
+    inventories = Inventory.all_objects.select_for_update().filter(hot_stripes__gt=0).order_by('product_id')
+    if inventory_ids is not None:
+        inventories = inventories.filter(pk__in=inventory_ids)
+    return sum(rebalance_stripes(inventory) for inventory in inventories)
+
+
+@transaction.atomic
+def set_hot_stripes(product_id, count):
+    try:
+        count = int(count)
+    except (TypeError, ValueError):
+        raise InvalidLineError("El número de sub-contadores debe ser un número entero.")
+    if count < 0:
+        raise InvalidLineError("El número de sub-contadores no puede ser negativo.")
+
+    inventory = Inventory.all_objects.select_for_update().filter(product_id=product_id).first()
+    if inventory is None:
+        raise InventoryNotFoundError("Este producto no existe en el inventario")
+    rebalance_stripes(inventory, count)
+    return inventory
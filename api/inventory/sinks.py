@@ -0,0 +1,55 @@
+import json
+import urllib.request
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+def event_payload(event, product_id=None):
+    return {
+        "id": event.pk,
+        "inventory_id": event.inventory_id,
+        "product_id": product_id,
+        "kind": event.kind,
+        "quantity": event.quantity,
+        "min_quantity": event.min_quantity,
+        "created_at": event.created_at.isoformat(),
+    }
+
+
+class LogFileSink:
+    def __init__(self, path=None):
+        self.path = path or settings.STOCK_EVENT_LOG_FILE
+
+    def send(self, events):
+        with open(self.path, 'a', encoding='utf-8') as log:
+            for event in events:
+                log.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+
+class HttpSink:
+    def __init__(self, url=None, timeout=5):
+        self.url = url or settings.STOCK_EVENT_HTTP_URL
+        self.timeout = timeout
+
+    def send(self, events):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"events": events}).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+SINKS = {
+    'log': LogFileSink,
+    'http': HttpSink,
+}
+
+
+def get_sinks(names=None):
+    return [
+        SINKS[name]() if name in SINKS else import_string(name)()
+        for name in (names or settings.STOCK_EVENT_SINKS)
+    ]
@@ -0,0 +1,64 @@
+import threading
+from unittest import skipUnless
+from django.db import connection
+from django.db.models import Sum
+from django.test import TransactionTestCase
+from inventory.factories import create_inventory
+from inventory.models import *
+from inventory.services import StockError, checkout
+
+
+def run_concurrently(threads, target):
+    """Lanza ``threads`` hilos con ``target`` y devuelve las excepciones inesperadas."""
+    errors = []
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            target()
+        except Exception as e:
+            with lock:
+                errors.append(e)
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return errors
+
+
+@skipUnless(connection.features.has_select_for_update, 'La base no bloquea filas con SELECT ... FOR UPDATE')
+class CheckoutConcurrencyTests(TransactionTestCase):
+    """Ventas concurrentes sobre un mismo producto: nunca se vende más de lo que hay."""
+
+    threads = 8
+    sales = 20
+    stock = 100
+
+    def test_concurrent_sales_never_oversell(self):
+        inventory = create_inventory('checkout-concurrency', self.stock)
+        results = {'ok': 0, 'rejected': 0}
+        lock = threading.Lock()
+
+        def sell():
+            for _ in range(self.sales):
+                try:
+                    checkout(None, [{'product_id': inventory.product_id, 'quantity': 1}])
+                    outcome = 'ok'
+                except StockError:
+                    outcome = 'rejected'
+                with lock:
+                    results[outcome] += 1
+
+        self.assertEqual(run_concurrently(self.threads, sell), [])
+
+        inventory.refresh_from_db()
+        sold = Output.objects.filter(inventory=inventory).aggregate(total=Sum('quantity'))['total'] or 0
+        self.assertEqual(results['ok'], self.stock)
+        self.assertEqual(results['rejected'], self.threads * self.sales - self.stock)
+        self.assertEqual(sold, self.stock)
+        self.assertEqual(inventory.quantity, 0)
+        self.assertEqual(Detail.objects.filter(inventory=inventory).count(), results['ok'])
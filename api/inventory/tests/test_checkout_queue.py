@@ -0,0 +1,62 @@
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from inventory.factories import create_inventory
+from inventory.models import *
+from inventory.services import enqueue_checkout, process_pending_checkouts
+from .test_checkout_concurrency import run_concurrently
+
+
+def drain(batch=50):
+    while process_pending_checkouts(batch) == batch:
+        pass
+
+
+class CheckoutQueueTests(TestCase):
+    """La venta en cola solo reserva: salidas, factura y detalles los escribe el trabajador."""
+
+    def setUp(self):
+        self.inventory = create_inventory('checkout-queue', 100)
+        self.line = [{'product_id': self.inventory.product_id, 'quantity': 1}]
+
+    def test_queued_sale_defers_ledger_writes(self):
+        enqueue_checkout(None, self.line)
+        self.assertFalse(Output.objects.filter(inventory=self.inventory).exists())
+        self.assertFalse(Detail.objects.filter(inventory=self.inventory).exists())
+        self.assertEqual(PendingCheckout.objects.filter(status=PendingCheckout.PENDING).count(), 1)
+
+    def test_drained_queue_matches_sales(self):
+        for _ in range(30):
+            enqueue_checkout(None, self.line)
+        drain(batch=7)
+
+        self.inventory.refresh_from_db()
+        self.assertEqual(self.inventory.quantity, 70)
+        self.assertEqual(self.inventory.reserved_quantity, 0)
+        self.assertEqual(Output.objects.filter(inventory=self.inventory).count(), 30)
+        self.assertEqual(PendingCheckout.objects.filter(status=PendingCheckout.DONE).count(), 30)
+
+
+@skipUnless(connection.features.has_select_for_update, 'La base no bloquea filas con SELECT ... FOR UPDATE')
+class CheckoutQueueConcurrencyTests(TransactionTestCase):
+    """Cajas concurrentes encolando ventas hasta agotar el stock: la cola vaciada cuadra."""
+
+    threads = 8
+    sales = 10
+
+    def test_concurrent_queued_sales_drain_exactly(self):
+        stock = self.threads * self.sales
+        inventory = create_inventory('checkout-queue', stock)
+        line = [{'product_id': inventory.product_id, 'quantity': 1}]
+
+        def sell():
+            for _ in range(self.sales):
+                enqueue_checkout(None, line)
+
+        self.assertEqual(run_concurrently(self.threads, sell), [])
+        drain()
+
+        inventory.refresh_from_db()
+        self.assertEqual(inventory.quantity, 0)
+        self.assertEqual(inventory.reserved_quantity, 0)
+        self.assertEqual(Output.objects.filter(inventory=inventory).count(), stock)
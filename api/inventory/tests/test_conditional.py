@@ -0,0 +1,65 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from inventory.factories import create_admin, create_inventory, create_product
+from inventory.management.commands.check_query_counts import UNCACHED
+from inventory.models import *
+
+
+@override_settings(CACHES=UNCACHED)
+class ListConditionalGetTests(TestCase):
+    """Los listados responden 304 con el permiso y una consulta de validadores, sin serializar."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_admin('conditional')
+        cls.products = [create_product(f'conditional-{i}') for i in range(3)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, **headers):
+        response = self.client.get(url, headers=headers)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def test_streamed_list_carries_validators_and_answers_304(self):
+        url = reverse('product-index')
+        response = self.get(url)
+        self.assertTrue(response.streaming)
+        self.assertIn('ETag', response.headers)
+        self.assertIn('Last-Modified', response.headers)
+
+        with self.assertNumQueries(2):
+            cached = self.get(url, if_none_match=response.headers['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        with self.assertNumQueries(2):
+            cached = self.get(url, if_modified_since=response.headers['Last-Modified'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_paginated_list_answers_304_until_a_row_changes(self):
+        url = reverse('product-index') + '?pag=2'
+        etag = self.get(url).headers['ETag']
+        self.assertEqual(self.get(url, if_none_match=etag).status_code, 304)
+
+        product = self.products[0]
+        product.name = 'conditional-renamed'
+        product.save()
+        response = self.get(url, if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_fingerprint_separates_query_params(self):
+        first = self.get(reverse('product-index') + '?pag=1').headers['ETag']
+        self.assertNotEqual(self.get(reverse('product-index') + '?pag=2').headers['ETag'], first)
+
+    def test_row_leaving_the_filter_changes_the_etag(self):
+        inventory = create_inventory('conditional-low', 1, min_quantity=5)
+        url = reverse('inventory-low-stock')
+        etag = self.get(url).headers['ETag']
+
+        inventory.quantity = 10
+        inventory.save()
+        self.assertEqual(self.get(url, if_none_match=etag).status_code, 200)
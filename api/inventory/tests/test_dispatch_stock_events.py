@@ -0,0 +1,70 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from inventory.factories import create_inventory
+from inventory.models import *
+
+SINK = 'inventory.tests.test_dispatch_stock_events.RejectingSink'
+
+
+class RejectingSink:
+    """Destino de prueba: rechaza cualquier envío que incluya un evento de ``rejected``."""
+    rejected = set()
+    received = []
+
+    def send(self, events):
+        ids = [event['id'] for event in events]
+        if self.rejected.intersection(ids):
+            raise ValueError(f"rechazado {ids}")
+        self.received.extend(ids)
+
+
+class DispatchStockEventsTests(TestCase):
+    """Un evento que el destino rechaza se pospone cada vez el doble y queda aparcado sin frenar a los demás."""
+
+    def setUp(self):
+        self.inventory = create_inventory('dispatch', 1, min_quantity=5)
+        self.events = [self.event() for _ in range(3)]
+        self.poison = self.events[1]
+        RejectingSink.rejected = {self.poison.pk}
+        RejectingSink.received = []
+        self.start = timezone.now()
+
+    def event(self):
+        return StockEvent.objects.create(inventory=self.inventory, kind=StockEvent.LOW_STOCK, quantity=1, min_quantity=5)
+
+    def dispatch(self, at):
+        with mock.patch('inventory.management.commands.dispatch_stock_events.timezone.now', return_value=at):
+            call_command('dispatch_stock_events', sinks=[SINK], max_attempts=3, retry_delay=10, stdout=StringIO(), stderr=StringIO())
+        self.poison.refresh_from_db()
+
+    def test_failing_event_backs_off_and_is_parked(self):
+        self.dispatch(self.start)
+        self.assertEqual(sorted(RejectingSink.received), [self.events[0].pk, self.events[2].pk])
+        self.assertEqual(self.poison.attempts, 1)
+        self.assertIn('rechazado', self.poison.last_error)
+        self.assertEqual(self.poison.next_attempt_at, self.start + timedelta(seconds=10))
+
+        # Antes de su próximo intento se salta, pero los nuevos sí salen.
+        late = self.event()
+        self.dispatch(self.start + timedelta(seconds=5))
+        self.assertEqual(RejectingSink.received[-1], late.pk)
+        self.assertEqual(self.poison.attempts, 1)
+
+        at = self.start + timedelta(seconds=10)
+        for attempts, delay in ((2, 20), (3, 40)):
+            self.dispatch(at)
+            self.assertEqual(self.poison.attempts, attempts)
+            self.assertEqual(self.poison.next_attempt_at, at + timedelta(seconds=delay))
+            at += timedelta(seconds=delay)
+
+        # Con max_attempts agotado queda aparcado aunque ya le toque.
+        self.dispatch(at + timedelta(days=1))
+        self.assertEqual(self.poison.attempts, 3)
+        self.assertIsNone(self.poison.dispatched_at)
+        self.assertNotIn(self.poison.pk, RejectingSink.received)
+        self.assertEqual(StockEvent.objects.filter(dispatched_at__isnull=True).count(), 1)
+        self.assertFalse(StockEvent.objects.exclude(pk=self.poison.pk).filter(last_error__isnull=False).exists())
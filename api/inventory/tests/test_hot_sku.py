@@ -0,0 +1,82 @@
+from django.db.models import Sum
+from django.test import TestCase
+from inventory.factories import create_inventory
+from inventory.models import *
+from inventory.services import (
+    InsufficientStockError, checkout, confirm_reservation, fold_stripes, reserve, set_hot_stripes
+)
+
+
+class HotSkuTests(TestCase):
+    """Un SKU caliente vende de sus sub-contadores sin perder el mínimo ni los eventos de stock."""
+
+    def setUp(self):
+        self.inventory = create_inventory('hot-sku', 10, min_quantity=5)
+        set_hot_stripes(self.inventory.product_id, 2)
+        self.inventory.refresh_from_db()
+
+    def sell(self, quantity):
+        # Los pliegues que dispara una venta corren al confirmarse la transacción.
+        with self.captureOnCommitCallbacks(execute=True):
+            checkout(None, [{'product_id': self.inventory.product_id, 'quantity': quantity}])
+        self.inventory.refresh_from_db()
+
+    def events(self):
+        return list(StockEvent.objects.filter(inventory=self.inventory).order_by('id').values_list('kind', 'quantity'))
+
+    def test_sales_above_minimum_leave_the_row_untouched(self):
+        self.sell(3)
+
+        self.assertEqual(self.inventory.quantity, 10)
+        self.assertEqual(self.inventory.available, 7)
+        self.assertFalse(self.inventory.below_min)
+        self.assertEqual(StockStripe.objects.filter(inventory=self.inventory).aggregate(sold=Sum('sold'))['sold'], 3)
+        self.assertEqual(self.events(), [])
+
+    def test_crossing_minimum_folds_and_records_low_stock(self):
+        self.sell(3)
+        self.sell(3)
+
+        self.assertEqual(self.inventory.quantity, 4)
+        self.assertTrue(self.inventory.below_min)
+        self.assertTrue(Inventory.objects.filter(below_min=True, pk=self.inventory.pk).exists())
+        self.assertEqual(self.events(), [(StockEvent.LOW_STOCK, 4)])
+        self.assertFalse(StockStripe.objects.filter(inventory=self.inventory, sold__gt=0).exists())
+
+    def test_selling_out_folds_and_records_zeroed(self):
+        self.sell(6)
+        self.sell(4)
+
+        self.assertEqual(self.inventory.quantity, 0)
+        self.assertEqual(self.inventory.available, 0)
+        self.assertEqual(self.events(), [(StockEvent.LOW_STOCK, 4), (StockEvent.ZEROED, 0)])
+        with self.assertRaises(InsufficientStockError):
+            self.sell(1)
+
+    def test_reservation_reclaims_from_stripes_and_confirms_on_the_real_quantity(self):
+        reservation, _ = reserve(None, [{'product_id': self.inventory.product_id, 'quantity': 4}])
+        self.inventory.refresh_from_db()
+        self.assertEqual(self.inventory.reserved_quantity, 4)
+        self.assertEqual(self.inventory.available, 6)
+
+        self.sell(6)
+        self.assertEqual(self.inventory.available, 0)
+
+        confirm_reservation(reservation.pk)
+        self.inventory.refresh_from_db()
+        self.assertEqual(self.inventory.quantity, 0)
+        self.assertEqual(self.inventory.reserved_quantity, 0)
+        self.assertEqual(self.inventory.available, 0)
+        self.assertEqual(self.events(), [(StockEvent.LOW_STOCK, 4), (StockEvent.ZEROED, 0)])
+        self.assertEqual(Output.objects.filter(inventory=self.inventory).count(), 2)
+
+    def test_fold_moves_sold_units_to_the_row(self):
+        self.sell(2)
+        self.assertEqual(fold_stripes([self.inventory.pk]), 2)
+        self.inventory.refresh_from_db()
+
+        self.assertEqual(self.inventory.quantity, 8)
+        self.assertEqual(self.inventory.striped_quantity, 8)
+        self.assertEqual(self.inventory.available, 8)
+        self.assertEqual(self.inventory.total_price, 8)
+        self.assertEqual(sorted(StockStripe.objects.filter(inventory=self.inventory).values_list('quantity', 'sold')), [(4, 0), (4, 0)])
@@ -0,0 +1,98 @@
+from unittest import mock, skipUnless
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from inventory.factories import create_admin, create_inventory
+from inventory.models import *
+from .test_checkout_concurrency import run_concurrently
+
+
+class IdempotencyMixin:
+
+    def setUp(self):
+        self.user = create_admin('idempotency')
+        self.inventory = create_inventory('idempotency', 10)
+        self.client = self.client_for(self.user)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def sell(self, key, quantity=1, client=None):
+        return (client or self.client).post(reverse('inventory-subtraction'), {
+            'document': self.user.document,
+            'products': [{'product_id': self.inventory.product_id, 'quantity': quantity}],
+        }, format='json', headers={'Idempotency-Key': key})
+
+
+class IdempotencyKeyTests(IdempotencyMixin, TestCase):
+    """Una venta con Idempotency-Key se ejecuta una vez; los reintentos reciben la respuesta guardada."""
+
+    def test_retry_replays_without_selling_again(self):
+        first = self.sell('till-1')
+        retry = self.sell('till-1')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.inventory.refresh_from_db()
+        self.assertEqual(self.inventory.quantity, 9)
+        self.assertEqual(Bill.objects.count(), 1)
+
+    def test_same_key_with_another_body_is_rejected(self):
+        self.sell('till-1')
+        self.assertEqual(self.sell('till-1', quantity=2).status_code, 422)
+
+    def test_concurrent_duplicate_replays_the_committed_response(self):
+        first = self.sell('till-1')
+        # El duplicado no vio la respuesta al entrar: choca en el índice único y la repite.
+        with mock.patch('inventory.idempotency.stored_record', return_value=None):
+            duplicate = self.sell('till-1')
+
+        self.assertEqual(duplicate.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(duplicate.json(), first.json())
+        self.assertEqual(Bill.objects.count(), 1)
+
+    def test_final_validation_error_is_replayed(self):
+        first = self.sell('till-1', quantity=50)
+        retry = self.sell('till-1', quantity=50)
+
+        self.assertEqual(first.status_code, 400)
+        self.assertEqual(retry.status_code, 400)
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+
+    def test_retry_after_conflict_runs_again(self):
+        # Modo caliente sin sub-contadores: la venta responde 409 "intente de nuevo".
+        Inventory.objects.filter(pk=self.inventory.pk).update(hot_stripes=1)
+        conflict = self.sell('till-1')
+        self.assertEqual(conflict.status_code, 409)
+        self.assertFalse(IdempotencyKey.objects.filter(key='till-1').exists())
+
+        Inventory.objects.filter(pk=self.inventory.pk).update(hot_stripes=0)
+        retry = self.sell('till-1')
+        self.assertEqual(retry.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', retry.headers)
+        self.inventory.refresh_from_db()
+        self.assertEqual(self.inventory.quantity, 9)
+
+
+@skipUnless(connection.features.has_select_for_update, 'La base no bloquea filas con SELECT ... FOR UPDATE')
+class IdempotencyConcurrencyTests(IdempotencyMixin, TransactionTestCase):
+    """Dos cajas con la misma clave a la vez: una vende y la otra recibe la misma respuesta."""
+
+    def test_concurrent_retries_sell_once(self):
+        responses = []
+
+        def sell():
+            responses.append(self.sell('till-1', client=self.client_for(self.user)))
+
+        self.assertEqual(run_concurrently(4, sell), [])
+
+        self.assertEqual({response.status_code for response in responses}, {200})
+        self.assertEqual(sum(1 for response in responses if 'Idempotent-Replayed' not in response.headers), 1)
+        self.inventory.refresh_from_db()
+        self.assertEqual(self.inventory.quantity, 9)
+        self.assertEqual(Bill.objects.count(), 1)
@@ -0,0 +1,75 @@
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from inventory.factories import create_admin, create_inventory
+from inventory.management.commands.check_query_counts import UNCACHED
+from inventory.models import *
+
+
+@override_settings(CACHES=UNCACHED)
+class KeysetPaginationTests(TestCase):
+    """Recorrer un listado por ?cursor= no repite ni salta filas aunque se inserten otras o empaten en created_at."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_admin('keyset')
+        cls.inventory = create_inventory('keyset', 0)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.start = timezone.now() - timedelta(hours=1)
+
+    def add_inputs(self, count, created_at):
+        rows = [Input.objects.create(inventory=self.inventory, quantity=1) for _ in range(count)]
+        Input.objects.filter(pk__in=[row.pk for row in rows]).update(created_at=created_at)
+        return [row.pk for row in rows]
+
+    def page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        return [row['id'] for row in body['results']['inputs']], body['next']
+
+    def walk(self, between_pages=None):
+        seen, pages = [], 0
+        url = reverse('input-index') + '?cursor=&pag=3'
+        while url:
+            ids, url = self.page(url)
+            seen.extend(ids)
+            pages += 1
+            self.assertLess(pages, 10, "El cursor no avanza.")
+            if between_pages:
+                between_pages(pages)
+        return seen
+
+    def test_tied_created_at_is_broken_by_id(self):
+        # Siete filas con el mismo created_at: la página corta en medio del empate.
+        tied = self.add_inputs(7, self.start)
+        later = self.add_inputs(2, self.start + timedelta(minutes=1))
+
+        seen = self.walk()
+
+        self.assertEqual(seen, tied + later)
+
+    def test_inserts_between_pages_cause_no_duplicates_or_gaps(self):
+        original = self.add_inputs(5, self.start) + self.add_inputs(4, self.start + timedelta(minutes=1))
+        inserted = []
+
+        def insert(pages):
+            # Una fila empatada con la primera tanda (queda detrás por id) y otra más reciente.
+            if pages <= 2:
+                inserted.extend(self.add_inputs(1, self.start))
+                inserted.extend(self.add_inputs(1, self.start + timedelta(minutes=2)))
+
+        seen = self.walk(insert)
+
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual([pk for pk in seen if pk in original], original)
+        expected = Input.objects.filter(pk__in=seen).order_by('created_at', 'id').values_list('id', flat=True)
+        self.assertEqual(seen, list(expected))
+        # Las más recientes quedan siempre por delante del cursor y se alcanzan.
+        newest = [pk for pk in inserted if Input.objects.get(pk=pk).created_at > self.start + timedelta(minutes=1)]
+        self.assertTrue(set(newest) <= set(seen))
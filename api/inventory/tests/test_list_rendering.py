@@ -0,0 +1,48 @@
+import json
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from inventory.factories import create_admin, create_product
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'list-rendering-tests'}}
+
+
+@override_settings(CACHES=LOCMEM)
+class ListRenderingTests(TestCase):
+    """Los listados solo se emiten por bloques o desde la caché cuando se negoció JSON."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_admin('rendering')
+        cls.product = create_product('rendering')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_json_is_streamed(self):
+        response = self.client.get(reverse('product-index'), {'format': 'json'})
+        self.assertTrue(response.streaming)
+        body = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([row['id'] for row in body['products']], [self.product.pk])
+
+    def test_browsable_api_gets_a_rendered_page(self):
+        for url in (reverse('product-index') + '?format=api', reverse('category-index') + '?format=api'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(response.streaming)
+                self.assertTrue(response['Content-Type'].startswith('text/html'))
+                self.assertIn(b'rendering', response.content)
+
+    def test_accept_header_is_honoured(self):
+        response = self.client.get(reverse('product-index'), headers={'accept': 'text/html'})
+        self.assertFalse(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+
+        # La página HTML no queda en la caché de los datos de referencia.
+        response = self.client.get(reverse('category-index'), headers={'accept': 'text/html'})
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+        response = self.client.get(reverse('category-index'))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual([row['name'] for row in response.json()['categories']], ['rendering'])
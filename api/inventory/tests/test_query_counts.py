@@ -0,0 +1,73 @@
+import json
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from inventory.factories import create_admin, seed_listings
+from inventory.management.commands.check_query_counts import BUDGETS, UNCACHED, endpoint_url
+
+
+@override_settings(CACHES=UNCACHED)
+class QueryBudgetTests(TestCase):
+    """Cada listado y detalle hace las consultas de BUDGETS, con pocas filas y con el doble."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_admin('query-budgets')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_budgets(self):
+        for name, query, budget in BUDGETS:
+            with self.subTest(endpoint=name + query):
+                url = endpoint_url(name) + query
+                with self.assertNumQueries(budget):
+                    response = self.client.get(url)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                self.assertEqual(response.status_code, 200)
+
+    def test_budgets_do_not_grow_with_rows(self):
+        seed_listings(5, 'a')
+        self.assert_budgets()
+        seed_listings(5, 'b')
+        self.assert_budgets()
+
+
+@override_settings(CACHES=UNCACHED)
+class SparseBillPlanTests(TestCase):
+    """Con ?fields= el listado de facturas solo une y precarga lo que se pidió, también con ?view=flat."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_admin('sparse-bills')
+        seed_listings(3, 'sparse')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, query):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('bill-index') + query)
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+        self.assertEqual(response.status_code, 200)
+        return json.loads(body), ' '.join(query['sql'] for query in queries.captured_queries)
+
+    def test_lines_without_inventory_fields_skip_the_inventory_joins(self):
+        for query in ('?fields=id,details.quantity', '?view=flat&fields=id,details.quantity'):
+            with self.subTest(query=query):
+                body, sql = self.get(query)
+                self.assertNotIn('"inventory_inventory"', sql)
+                self.assertNotIn('"inventory_user"', sql)
+                self.assertEqual({tuple(line) for bill in body['bills'] for line in bill['details']}, {('quantity',)})
+
+    def test_flat_product_ids_still_join_the_inventory(self):
+        body, sql = self.get('?view=flat&fields=id,details.product_id')
+        self.assertIn('"inventory_inventory"', sql)
+        self.assertNotIn('"inventory_user"', sql)
+        self.assertEqual(body['users'], [])
+        self.assertEqual(len(body['products']), 3)
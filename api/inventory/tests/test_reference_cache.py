@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from inventory.factories import create_admin
+from inventory.models import *
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'reference-cache-tests'}}
+
+
+@override_settings(CACHES=LOCMEM)
+class ReferenceCacheTests(TestCase):
+    """Los listados de referencia se sirven de la caché hasta que cualquier escritura del modelo sube su versión."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_admin('reference-cache')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def names(self, url, envelope):
+        response = self.client.get(url)
+        return sorted(row['name'] for row in response.json()[envelope])
+
+    def write(self, function, *args, **kwargs):
+        # La versión sube al confirmarse la transacción.
+        with self.captureOnCommitCallbacks(execute=True):
+            return function(*args, **kwargs)
+
+    def test_cached_listing_skips_the_database(self):
+        url = reverse('category-index')
+        self.names(url, 'categories')
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def test_orm_writes_outside_the_views_invalidate(self):
+        url = reverse('category-index')
+        self.assertEqual(self.names(url, 'categories'), [])
+
+        category = self.write(Category.objects.create, name='Bebidas')
+        self.assertEqual(self.names(url, 'categories'), ['Bebidas'])
+
+        category.name = 'Lácteos'
+        self.write(category.save)
+        self.assertEqual(self.names(url, 'categories'), ['Lácteos'])
+
+        self.write(category.delete)
+        self.assertEqual(self.names(url, 'categories'), [])
+
+        self.write(category.restore)
+        self.assertEqual(self.names(url, 'categories'), ['Lácteos'])
+
+    def test_seeders_invalidate_units(self):
+        url = reverse('unit-index')
+        self.assertEqual(self.names(url, 'units'), [])
+
+        self.write(call_command, 'seeders')
+        self.assertIn('Kilogramo', self.names(url, 'units'))
+
+    def test_other_models_keep_their_cache(self):
+        url = reverse('coin-index')
+        self.names(url, 'coins')
+        self.write(Category.objects.create, name='Bebidas')
+        with self.assertNumQueries(1):
+            self.client.get(url)
@@ -0,0 +1,89 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from inventory.factories import create_inventory
+from inventory.models import *
+from inventory.services import (
+    InsufficientStockError, ReservationStateError, confirm_reservation, expire_reservations,
+    release_reservation, reserve, set_hot_stripes
+)
+
+
+class ReservationTests(TestCase):
+    """Una reserva retiene stock en reserved_quantity hasta confirmarse, liberarse o vencer."""
+
+    def setUp(self):
+        self.inventory = create_inventory('reservations', 10, min_quantity=2)
+        self.line = [{'product_id': self.inventory.product_id, 'quantity': 4}]
+
+    def refresh(self):
+        self.inventory.refresh_from_db()
+        return self.inventory
+
+    def test_reservation_reduces_available_only(self):
+        reservation, _ = reserve(None, self.line)
+
+        inventory = self.refresh()
+        self.assertEqual(reservation.status, Reservation.ACTIVE)
+        self.assertEqual((inventory.quantity, inventory.reserved_quantity, inventory.available), (10, 4, 6))
+        self.assertFalse(Output.objects.filter(inventory=inventory).exists())
+        with self.assertRaises(InsufficientStockError):
+            reserve(None, [{'product_id': inventory.product_id, 'quantity': 7}])
+
+    def test_confirm_writes_the_sale(self):
+        reservation, _ = reserve(None, self.line)
+        reservation, _ = confirm_reservation(reservation.pk)
+
+        inventory = self.refresh()
+        self.assertEqual(reservation.status, Reservation.CONFIRMED)
+        self.assertEqual((inventory.quantity, inventory.reserved_quantity, inventory.available), (6, 0, 6))
+        self.assertEqual(list(Output.objects.filter(inventory=inventory).values_list('quantity', flat=True)), [4])
+        self.assertEqual(list(Detail.objects.filter(bill=reservation.bill).values_list('quantity', flat=True)), [4])
+        self.assertEqual(list(StockMovement.objects.filter(inventory=inventory).values_list('kind', 'quantity')), [(StockMovement.OUTPUT, -4)])
+        self.assertEqual(DailyMovement.objects.get(inventory=inventory).output_quantity, 4)
+        with self.assertRaises(ReservationStateError):
+            confirm_reservation(reservation.pk)
+
+    def test_release_restores_reserved_quantity(self):
+        reservation, _ = reserve(None, self.line)
+        reservation = release_reservation(reservation.pk)
+
+        inventory = self.refresh()
+        self.assertEqual(reservation.status, Reservation.RELEASED)
+        self.assertEqual((inventory.quantity, inventory.reserved_quantity, inventory.available), (10, 0, 10))
+        with self.assertRaises(ReservationStateError):
+            confirm_reservation(reservation.pk)
+
+    def test_expired_reservation_cannot_be_confirmed(self):
+        reservation, _ = reserve(None, self.line, ttl=60)
+        Reservation.objects.filter(pk=reservation.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        with self.assertRaises(ReservationStateError):
+            confirm_reservation(reservation.pk)
+
+    def test_sweeper_expires_stale_holds_in_batches(self):
+        stale = [reserve(None, [{'product_id': self.inventory.product_id, 'quantity': 1}])[0] for _ in range(3)]
+        fresh, _ = reserve(None, [{'product_id': self.inventory.product_id, 'quantity': 2}])
+        Reservation.objects.filter(pk__in=[reservation.pk for reservation in stale]).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(expire_reservations(batch=2), 2)
+        call_command('expire_reservations', batch=2, stdout=StringIO())
+
+        self.assertEqual(Reservation.objects.filter(status=Reservation.EXPIRED).count(), 3)
+        self.assertEqual(Reservation.objects.get(pk=fresh.pk).status, Reservation.ACTIVE)
+        self.assertEqual(self.refresh().reserved_quantity, 2)
+
+    def test_expiry_after_reclaiming_from_stripes(self):
+        set_hot_stripes(self.inventory.product_id, 2)
+        reservation, _ = reserve(None, self.line)
+
+        inventory = self.refresh()
+        self.assertEqual((inventory.reserved_quantity, inventory.striped_quantity, inventory.available), (4, 6, 6))
+        self.assertEqual(sum(StockStripe.objects.filter(inventory=inventory).values_list('quantity', flat=True)), 6)
+
+        Reservation.objects.filter(pk=reservation.pk).update(expires_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(expire_reservations(), 1)
+
+        inventory = self.refresh()
+        self.assertEqual((inventory.quantity, inventory.reserved_quantity, inventory.available), (10, 0, 10))
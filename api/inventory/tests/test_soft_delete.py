@@ -0,0 +1,73 @@
+import json
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from inventory.factories import create_admin, create_inventory
+from inventory.management.commands.check_query_counts import UNCACHED
+from inventory.models import *
+from inventory.services import add_stock
+
+
+@override_settings(CACHES=UNCACHED)
+class SoftDeleteTests(TestCase):
+    """Lo eliminado no aparece en Index ni Show, sigue contando para la unicidad y se puede restaurar."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_admin('soft-delete')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.inventory = create_inventory('soft-delete', 5)
+        self.product = self.inventory.product
+
+    def listing(self, name, envelope, scope=None):
+        response = self.client.get(reverse(name), {'scope': scope} if scope else {})
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return [row['id'] for row in json.loads(body)[envelope]]
+
+    def test_deleted_product_is_hidden_until_restored(self):
+        self.product.delete()
+
+        self.assertNotIn(self.product.pk, self.listing('product-index', 'products'))
+        self.assertEqual(self.listing('product-index', 'products', scope='deleted'), [self.product.pk])
+        self.assertIn(self.product.pk, self.listing('product-index', 'products', scope='all'))
+        self.assertEqual(self.client.get(reverse('product-show', args=[self.product.pk])).status_code, 404)
+
+        response = self.client.get(reverse('product-restore', args=[self.product.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.product.pk, self.listing('product-index', 'products'))
+        self.assertEqual(self.client.get(reverse('product-show', args=[self.product.pk])).status_code, 200)
+
+    def test_deleted_inventory_is_hidden_until_restored(self):
+        self.inventory.delete()
+
+        self.assertNotIn(self.inventory.pk, self.listing('inventory-index', 'inventories'))
+        self.assertEqual(self.listing('inventory-index', 'inventories', scope='deleted'), [self.inventory.pk])
+        self.assertEqual(self.client.get(reverse('inventory-show', args=[self.inventory.pk])).status_code, 404)
+
+        self.inventory.restore()
+        self.assertIn(self.inventory.pk, self.listing('inventory-index', 'inventories'))
+        self.assertEqual(self.client.get(reverse('inventory-show', args=[self.inventory.pk])).status_code, 200)
+
+    def test_stock_for_a_deleted_inventory_reuses_its_row(self):
+        self.inventory.delete()
+
+        self.assertEqual(add_stock(self.product.pk, 3)[::2], (8, False))
+        self.assertEqual(Inventory.all_objects.filter(product=self.product).count(), 1)
+        self.assertFalse(Inventory.objects.filter(product=self.product).exists())
+
+    def test_registration_rejects_values_of_deleted_users(self):
+        deleted = User.objects.create(username='ghost', email='ghost@example.com', document='ghost', address='-', phone_number='-')
+        deleted.delete()
+        self.assertFalse(User.objects.filter(pk=deleted.pk).exists())
+
+        response = APIClient().post(reverse('user-registration'), {
+            'username': 'ghost', 'password': 'secreta123', 'email': 'ghost@example.com', 'name': 'Ghost',
+            'last_name': 'User', 'document': 'ghost', 'address': '-', 'phone_number': '-',
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {'username', 'email', 'document'})
+        self.assertEqual(User.all_objects.filter(username='ghost').count(), 1)
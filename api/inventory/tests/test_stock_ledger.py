@@ -0,0 +1,62 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from inventory.factories import create_inventory
+from inventory.models import *
+from inventory.services import add_stock, quantity_as_of, take_checkpoints
+
+
+class QuantityAsOfBackfillTests(TestCase):
+    """Los movimientos copiados con --backfill después de un corte no se suman dos veces."""
+
+    def setUp(self):
+        self.now = timezone.now()
+        # Historia anterior al libro de movimientos: entró 10 y salió 3.
+        self.inventory = create_inventory('ledger', 7)
+        self.legacy(Input, 10, days=3)
+        self.legacy(Output, 3, days=2)
+
+    def legacy(self, model, quantity, days):
+        row = model.objects.create(inventory=self.inventory, quantity=quantity)
+        model.objects.filter(pk=row.pk).update(created_at=self.now - timedelta(days=days))
+
+    def backdate_checkpoints(self, hours):
+        StockCheckpoint.objects.filter(inventory=self.inventory).update(taken_at=self.now - timedelta(hours=hours))
+
+    def backfill(self):
+        call_command('stock_checkpoints', backfill=True, stdout=StringIO())
+
+    def assert_matches_live(self):
+        self.inventory.refresh_from_db()
+        self.assertEqual(quantity_as_of(self.inventory.pk, timezone.now()), self.inventory.quantity)
+
+    def test_backfill_after_checkpoint_with_movements(self):
+        add_stock(self.inventory.product_id, 5)
+        StockMovement.objects.filter(inventory=self.inventory).update(created_at=self.now - timedelta(hours=2))
+        take_checkpoints([self.inventory.pk])
+        self.backdate_checkpoints(hours=1)
+
+        self.backfill()
+
+        self.assertEqual(quantity_as_of(self.inventory.pk, self.now - timedelta(minutes=30)), 12)
+        self.assertEqual(quantity_as_of(self.inventory.pk, self.now - timedelta(days=2, hours=12)), 10)
+        self.assert_matches_live()
+
+    def test_backfill_after_checkpoint_without_movements(self):
+        take_checkpoints([self.inventory.pk])
+        self.assertIsNone(StockCheckpoint.objects.get(inventory=self.inventory).last_movement_id)
+        self.backdate_checkpoints(hours=1)
+
+        self.backfill()
+
+        self.assertEqual(quantity_as_of(self.inventory.pk, self.now - timedelta(minutes=30)), 7)
+        self.assertEqual(quantity_as_of(self.inventory.pk, self.now - timedelta(days=1)), 7)
+        self.assert_matches_live()
+
+    def test_movements_after_checkpoint_are_added(self):
+        self.backfill()
+        add_stock(self.inventory.product_id, 4)
+        self.assert_matches_live()
+        self.assertEqual(quantity_as_of(self.inventory.pk, timezone.now()), 11)
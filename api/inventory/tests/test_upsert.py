@@ -0,0 +1,45 @@
+from decimal import Decimal
+from django.test import TestCase
+from inventory.factories import create_product
+from inventory.models import *
+from inventory.services import add_stock, set_min_quantity, upsert_inventory
+
+
+class UpsertInventoryTests(TestCase):
+    """upsert_inventory crea o incrementa la fila del producto en una sentencia y devuelve la cantidad resultante."""
+
+    def setUp(self):
+        self.product = create_product('upsert', Decimal('2.50'))
+
+    def row(self):
+        return Inventory.all_objects.get(product=self.product)
+
+    def test_second_call_increments_the_same_row(self):
+        self.assertEqual(upsert_inventory(self.product.pk, 3, self.product.price), (3, True))
+        self.assertEqual(upsert_inventory(self.product.pk, 4, self.product.price), (7, False))
+
+        self.assertEqual(Inventory.all_objects.filter(product=self.product).count(), 1)
+        inventory = self.row()
+        self.assertEqual(inventory.quantity, 7)
+        self.assertEqual(inventory.total_price, Decimal('17.50'))
+        self.assertEqual(inventory.min_quantity, 5)
+        self.assertFalse(inventory.below_min)
+
+    def test_min_quantity_only_upsert_keeps_quantity(self):
+        self.assertEqual(upsert_inventory(self.product.pk, min_quantity=2), (0, True))
+        upsert_inventory(self.product.pk, 3, self.product.price)
+        self.assertEqual(upsert_inventory(self.product.pk, min_quantity=10), (3, False))
+
+        inventory = self.row()
+        self.assertEqual((inventory.quantity, inventory.min_quantity), (3, 10))
+        self.assertTrue(inventory.below_min)
+        self.assertEqual(inventory.total_price, Decimal('7.50'))
+
+    def test_add_stock_and_set_min_quantity_report_created_once(self):
+        self.assertEqual(add_stock(self.product.pk, 2), (2, Decimal('5.00'), True))
+        self.assertEqual(add_stock(self.product.pk, 6), (8, Decimal('20.00'), False))
+        self.assertEqual(set_min_quantity(self.product.pk, 9), (9, False))
+
+        self.assertEqual(Inventory.all_objects.filter(product=self.product).count(), 1)
+        self.assertEqual(Input.objects.filter(inventory__product=self.product).count(), 2)
+        self.assertTrue(self.row().below_min)